@@ -0,0 +1,242 @@
+#########################################################################################
+#
+#                                   Batch Environment
+#
+#   Purpose: Plays many games of snake at the same time. Every game follows the same
+#            rules as Cgame and Csnake_human, but the state of all games is stored in
+#            NumPy arrays so 1 call to step moves every snake.
+#
+#   Board layout: boards are measured in cells, like Cgame. A cell is numbered
+#                 y*cols + x for the (x,y) cell used by Cgame. Like Csnake_human, each
+#                 snake starts with 1 chunk in the center of the board and does not
+#                 move until it is given its first action.
+#
+#   Actions: 0...left
+#            1...right
+#            2...up
+#            3...down
+#           -1...keep moving in the current direction
+#
+#   Class attributes:
+#       1. num_games...the number of games played at once
+#       2. cols........the width of each board in cells
+#       3. rows........the height of each board in cells
+#       4. occupancy...(num_games, rows*cols) array, 1 where a snake chunk is
+#       5. body........(num_games, rows*cols) ring buffer of the cells of each snake
+#       6. head_ptr....index of the head of each snake in body
+#       7. length......the size of each snake
+#       8. x_delta.....the direction each snake is moving in x
+#       9. y_delta.....the direction each snake is moving in y
+#       10. snack......the cell of the snack in each game
+#       11. alive......True for each game that is not over
+#       12. cause......why each game ended (see ALIVE, WALL, SELF and FULL)
+#       13. steps......the number of steps played in each game
+#       14. rng........the numpy random generator used to place snacks
+#
+#   Methods:
+#       - __init__.......allocates the arrays and starts every game
+#       - reset..........restarts every game
+#       - reset_games....restarts some of the games
+#       - step...........moves every snake that is alive
+#       - set_snack......places snacks in the games where they were eaten
+#       - get_position...returns the (x,y) cells of 1 snake, head first
+#       - get_size.......returns the size of every snake
+#
+#########################################################################################
+import numpy as np
+
+LEFT = 0
+RIGHT = 1
+UP = 2
+DOWN = 3
+X_DELTA = np.array([-1, 1, 0, 0])
+Y_DELTA = np.array([0, 0, -1, 1])
+
+ALIVE = 0
+WALL = 1
+SELF = 2
+FULL = 3
+
+class Cbatch_env:
+
+    #####################################################################################
+    #
+    #   Cbatch_env:__init__
+    #       Parameters: 1. p_num_games...the number of games played at once
+    #                   2. p_cols........the width of the board in cells
+    #                   3. p_rows........the height of the board in cells. If None,
+    #                                    the board is square
+    #                   4. p_seed........the seed for placing snacks
+    #
+    #####################################################################################
+    def __init__(self, p_num_games, p_cols, p_rows = None, p_seed = None):
+        if p_rows is None:
+            p_rows = p_cols
+        if p_cols < 1 or p_rows < 1 or p_num_games < 1:
+            raise ValueError("the board and the number of games must be positive")
+        self.num_games = p_num_games
+        self.cols = p_cols
+        self.rows = p_rows
+        self.num_cells = p_cols * p_rows
+        self.rng = np.random.default_rng(p_seed)
+        self.games = np.arange(p_num_games)
+        self.occupancy = np.zeros((p_num_games, self.num_cells), dtype=np.uint8)
+        self.body = np.zeros((p_num_games, self.num_cells), dtype=np.int32)
+        self.head_ptr = np.zeros(p_num_games, dtype=np.int64)
+        self.length = np.zeros(p_num_games, dtype=np.int64)
+        self.x_delta = np.zeros(p_num_games, dtype=np.int64)
+        self.y_delta = np.zeros(p_num_games, dtype=np.int64)
+        self.snack = np.zeros(p_num_games, dtype=np.int64)
+        self.alive = np.zeros(p_num_games, dtype=bool)
+        self.cause = np.zeros(p_num_games, dtype=np.int8)
+        self.steps = np.zeros(p_num_games, dtype=np.int64)
+        self.reset()
+
+    #####################################################################################
+    #
+    #   Cbatch_env:reset
+    #       Description: puts a snake of size 1 in the center of every board and places
+    #                    the first snacks
+    #
+    #####################################################################################
+    def reset(self):
+        self.reset_games(self.games)
+
+    #####################################################################################
+    #
+    #   Cbatch_env:reset_games
+    #       Parameters: 1. p_games...the games to restart
+    #
+    #       Description: restarts only p_games, so finished games can be replaced while
+    #                    the others keep playing
+    #
+    #####################################################################################
+    def reset_games(self, p_games):
+        games = np.asarray(p_games)
+        center = (self.rows // 2) * self.cols + self.cols // 2
+        self.occupancy[games] = 0
+        self.occupancy[games, center] = 1
+        self.body[games, 0] = center
+        self.head_ptr[games] = 0
+        self.length[games] = 1
+        self.x_delta[games] = 0
+        self.y_delta[games] = 0
+        self.alive[games] = True
+        self.cause[games] = ALIVE
+        self.steps[games] = 0
+        self.set_snack(games)
+
+    #####################################################################################
+    #
+    #   Cbatch_env:step
+    #       Parameters: 1. p_actions...1 action per game (see the actions above).
+    #                                  Actions for games that are over are ignored
+    #
+    #       Returns: a boolean array that is True for each game that ate a snack
+    #
+    #       Description: moves every live snake 1 cell. Like Csnake_human, the tail is
+    #                    removed before checking if the head ran into the body, so a
+    #                    snake may move into the cell its tail just left.
+    #
+    #####################################################################################
+    def step(self, p_actions):
+        actions = np.asarray(p_actions)
+        alive = self.alive
+        turn = alive & (actions >= 0)
+        self.x_delta[turn] = X_DELTA[actions[turn]]
+        self.y_delta[turn] = Y_DELTA[actions[turn]]
+        games = self.games[alive]
+        head = self.body[games, self.head_ptr[games]]
+        x = head % self.cols + self.x_delta[games]
+        y = head // self.cols + self.y_delta[games]
+        self.steps[games] += 1
+
+        wall = (x < 0) | (y < 0) | (x >= self.cols) | (y >= self.rows)
+        self.alive[games[wall]] = False
+        self.cause[games[wall]] = WALL
+        moving = ~wall
+        games = games[moving]
+        new_head = y[moving] * self.cols + x[moving]
+
+        ate = new_head == self.snack[games]
+        popping = games[~ate]
+        tail_ptr = (self.head_ptr[popping] - self.length[popping] + 1) % self.num_cells
+        self.occupancy[popping, self.body[popping, tail_ptr]] = 0
+        self.length[popping] -= 1
+
+        hit = self.occupancy[games, new_head] != 0
+        self.alive[games[hit]] = False
+        self.cause[games[hit]] = SELF
+        games = games[~hit]
+        new_head = new_head[~hit]
+        ate = ate[~hit]
+
+        self.head_ptr[games] = (self.head_ptr[games] + 1) % self.num_cells
+        self.body[games, self.head_ptr[games]] = new_head
+        self.occupancy[games, new_head] = 1
+        self.length[games] += 1
+
+        eaten = np.zeros(self.num_games, dtype=bool)
+        eaten[games[ate]] = True
+        full = eaten & (self.length == self.num_cells)
+        self.alive[full] = False
+        self.cause[full] = FULL
+        self.set_snack(self.games[eaten & ~full])
+        return eaten
+
+    #####################################################################################
+    #
+    #   Cbatch_env:set_snack
+    #       Parameters: 1. p_games...the games that need a new snack
+    #
+    #       Description: places each snack in a cell chosen uniformly from the cells
+    #                    that are not part of the snake. A few rounds of rejection
+    #                    sampling place most snacks; the games that are left (boards
+    #                    that are nearly full) pick the n-th free cell directly. Games
+    #                    with no free cell are over, with cause FULL and snack -1
+    #
+    #####################################################################################
+    def set_snack(self, p_games):
+        pending = np.asarray(p_games)
+        for attempt in range(4):
+            if len(pending) == 0:
+                return
+            cells = self.rng.integers(0, self.num_cells, size=len(pending))
+            free = self.occupancy[pending, cells] == 0
+            self.snack[pending[free]] = cells[free]
+            pending = pending[~free]
+        if len(pending) == 0:
+            return
+        free = self.occupancy[pending] == 0
+        counts = np.cumsum(free, axis=1)
+        full = counts[:, -1] == 0
+        if full.any():
+            self.alive[pending[full]] = False
+            self.cause[pending[full]] = FULL
+            self.snack[pending[full]] = -1
+            pending = pending[~full]
+            counts = counts[~full]
+        choice = self.rng.integers(0, counts[:, -1])
+        self.snack[pending] = np.argmax(counts > choice[:, None], axis=1)
+
+    #####################################################################################
+    #
+    #   Cbatch_env:get_position
+    #       Parameters: 1. p_game...the index of the game
+    #
+    #       Returns: a list of the (x,y) cells of the snake, starting at the head
+    #
+    #####################################################################################
+    def get_position(self, p_game):
+        ptr = (self.head_ptr[p_game] - np.arange(self.length[p_game])) % self.num_cells
+        cells = self.body[p_game, ptr]
+        return list(zip((cells % self.cols).tolist(), (cells // self.cols).tolist()))
+
+    #####################################################################################
+    #
+    #   Cbatch_env:get_size
+    #       Returns: the size of every snake
+    #
+    #####################################################################################
+    def get_size(self):
+        return self.length
@@ -0,0 +1,354 @@
+#########################################################################################
+#
+#                                      Benchmarks
+#
+#   Purpose: Measures the speed of the hot paths of the game and the networks, and
+#            compares the results to a saved baseline so slowdowns are caught early.
+#
+#   Usage: python bench.py [-o results.json] [-b baseline.json] [-t 0.15] [-r 3]
+#                          [-k name]
+#       -o...write the results as JSON
+#       -b...compare to a JSON file written by -o; exits with status 1 if any result
+#            is worse than the baseline by more than the tolerance
+#       -t...the tolerance, as a fraction of the baseline (default 0.15)
+#       -r...with -b, benchmarks with a regression are run again up to this many
+#            times, keeping the best value of each result (default 3)
+#       -k...only run benchmarks whose name contains this text
+#
+#   Noise: back to back runs of the same code differ by up to about 30% on a busy
+#          machine, most of it in the timings of calls shorter than SHORT_CALL. A
+#          slowdown only counts as a regression if it is over the tolerance (at least
+#          SHORT_CALL_TOLERANCE for short calls), is over the NOISE_FLOOR of its
+#          unit, and is still there after the reruns. A real slowdown shows up in
+#          every run, noise rarely does.
+#
+#   Results: every benchmark returns a dictionary of named results. Each result is
+#            {"value": number, "unit": text, "higher_is_better": bool}, plus
+#            "call_seconds", the time of 1 timed call, for results timed 1 call at a
+#            time (results per sample of a batch give the time of the batch).
+#
+#   Benchmarks:
+#       - engine.......Cgame.step steps per second, headless, with and without a
+#                      Cprofiler
+#       - batch_env....Cbatch_env game steps per second
+#       - game_over....cost of Cgame.game_over as the snake grows
+#       - set_snack....cost of Cgame.set_snack as the snake fills the board
+#       - inference....Cneural_net and Cneural_population time per input
+#       - q_learning...Q-learning training steps per second in a Cbatch_env
+#       - checkpoint...saving and loading networks and populations
+#
+#########################################################################################
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+import numpy as np
+from batch_env import Cbatch_env
+from checkpoint import save_network, load_network, save_population, load_population
+from game import Cgame
+from neural_net import Cneural_net, NUM_PARAMETERS
+from neural_population import Cneural_population
+from profiler import Cprofiler
+from q_agent import train_q
+from snake import Csnake
+from snake_greedy import Cgreedy_snake
+
+# the smallest slowdown, in each unit, that can count as a regression
+NOISE_FLOOR = {"ns": 150}
+# timed calls shorter than this many seconds are noisy, and use at least
+# SHORT_CALL_TOLERANCE
+SHORT_CALL = 1e-5
+SHORT_CALL_TOLERANCE = 0.3
+
+#########################################################################################
+#
+#   seconds_per_call
+#       Parameters: 1. p_function...a function with no parameters
+#                   2. p_repeat.....the number of timing runs
+#
+#       Return: the fastest time of 1 call, in seconds
+#
+#########################################################################################
+def seconds_per_call(p_function, p_repeat = 5):
+    timer = timeit.Timer(p_function)
+    calls, elapsed = timer.autorange()
+    return min(timer.repeat(p_repeat, calls)) / calls
+
+#########################################################################################
+#
+#   result
+#       Parameters: 1. p_value..............the measured value
+#                   2. p_unit...............the unit of p_value
+#                   3. p_higher_is_better...True for rates, False for times
+#                   4. p_call_seconds.......the time of 1 timed call, if known
+#
+#       Return: 1 result in the format described above
+#
+#########################################################################################
+def result(p_value, p_unit, p_higher_is_better, p_call_seconds = None):
+    value = {"value": p_value, "unit": p_unit, "higher_is_better": p_higher_is_better}
+    if p_call_seconds is not None:
+        value["call_seconds"] = p_call_seconds
+    return value
+
+#########################################################################################
+#
+#   long_snake
+#       Parameters: 1. p_length...the number of chunks in the snake
+#
+#       Return: a Csnake of p_length chunks on an 80 by 80 cell board, laid out row by
+#               row starting at the top left corner
+#
+#########################################################################################
+def long_snake(p_length):
+    snake = Csnake(80, 80)
+    snake.board.pop_tail()
+    for i in range(p_length):
+        y = i // 80
+        x = i % 80 if y % 2 == 0 else 79 - i % 80
+        snake.board.push_head((x, y))
+    snake.size = p_length
+    return snake
+
+#########################################################################################
+#
+#   bench_engine
+#       Return: Cgame steps per second (steps/s) of 1 seeded 1000 step headless game
+#               of Cgreedy_snake, with and without a Cprofiler
+#
+#########################################################################################
+def bench_engine():
+    results = {}
+    for name, profiler in [("steps_per_second", None), ("profiled_steps_per_second", Cprofiler())]:
+        game = Cgame(32, 32)
+        game.profiler = profiler
+        # every call plays the same game, so the timed calls and the step count match
+        play = lambda: game.play_game(Cgreedy_snake(32, 32), (), 1000, 0)
+        seconds = seconds_per_call(play, 3)
+        results[name] = result(game.steps / seconds, "steps/s", True)
+    return results
+
+#########################################################################################
+#
+#   bench_batch_env
+#       Return: game steps per second (steps/s) of 10000 Cbatch_env games playing
+#               64 random actions each
+#
+#########################################################################################
+def bench_batch_env():
+    env = Cbatch_env(10000, 32, p_seed=0)
+    actions = np.random.default_rng(0).integers(0, 4, (64, 10000))
+    def play():
+        env.reset()
+        for row in actions:
+            env.step(row)
+    return {"game_steps_per_second": result(10000 * len(actions) / seconds_per_call(play, 3), "steps/s", True)}
+
+#########################################################################################
+#
+#   bench_game_over
+#       Return: the time of 1 Cgame.game_over call (ns) for snakes of 1 to 6000
+#               chunks
+#
+#########################################################################################
+def bench_game_over():
+    game = Cgame(80, 80)
+    results = {}
+    for length in [1, 10, 100, 1000, 6000]:
+        snake = long_snake(length)
+        seconds = seconds_per_call(lambda: game.game_over(snake))
+        results["length_" + str(length)] = result(seconds * 1e9, "ns", False, seconds)
+    return results
+
+#########################################################################################
+#
+#   bench_set_snack
+#       Return: the time of 1 Cgame.set_snack call (ns) with 50% to 99.9% of an 80
+#               by 80 board covered by the snake
+#
+#########################################################################################
+def bench_set_snack():
+    game = Cgame(80, 80, p_seed=0)
+    results = {}
+    for occupancy in [0.5, 0.9, 0.99, 0.999]:
+        snake = long_snake(int(6400 * occupancy))
+        seconds = seconds_per_call(lambda: game.set_snack(snake))
+        results["occupancy_" + str(occupancy)] = result(seconds * 1e9, "ns", False, seconds)
+    return results
+
+#########################################################################################
+#
+#   bench_inference
+#       Return: the time (ns) of 1 Cneural_net feed_forward, with and without
+#               reused buffers, and of Cneural_population feed_forward on batches of
+#               1, 100 and 10000 networks in float64 and float32, per batch and per
+#               sample
+#
+#########################################################################################
+def bench_inference():
+    rng = np.random.default_rng(0)
+    network = Cneural_net("new", rng)
+    vector = rng.standard_normal((32, 1))
+    results = {}
+    seconds = seconds_per_call(lambda: network.feed_forward(vector))
+    results["network_per_sample"] = result(seconds * 1e9, "ns", False, seconds)
+    seconds = seconds_per_call(lambda: network.feed_forward(vector, True))
+    results["network_reused_buffers_per_sample"] = result(seconds * 1e9, "ns", False, seconds)
+    for size in [1, 100, 10000]:
+        for dtype in [np.float64, np.float32]:
+            population = Cneural_population(rng.standard_normal((size, NUM_PARAMETERS)), dtype)
+            inputs = rng.standard_normal((size, 32)).astype(dtype)
+            seconds = seconds_per_call(lambda: population.feed_forward(inputs))
+            name = "population_" + str(size) + "_" + np.dtype(dtype).name
+            results[name + "_per_batch"] = result(seconds * 1e9, "ns", False, seconds)
+            results[name + "_per_sample"] = result(seconds * 1e9 / size, "ns", False, seconds)
+    return results
+
+#########################################################################################
+#
+#   bench_q_learning
+#       Return: train_q steps per second (steps/s) over 256 games
+#
+#########################################################################################
+def bench_q_learning():
+    seconds = seconds_per_call(lambda: train_q(256 * 200, p_seed=0), 3)
+    return {"training_steps_per_second": result(256 * 200 / seconds, "steps/s", True)}
+
+#########################################################################################
+#
+#   bench_checkpoint
+#       Return: the time (us) to save and load 1 network as text and as .npy, and
+#               the speed (MB/s) of saving and loading a 1000 network population
+#
+#########################################################################################
+def bench_checkpoint():
+    rng = np.random.default_rng(0)
+    network = Cneural_net("new", rng)
+    parameters = rng.standard_normal((1000, NUM_PARAMETERS))
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        text_path = os.path.join(directory, "text")
+        binary_path = os.path.join(directory, "network.npy")
+        population_path = os.path.join(directory, "population.npy")
+        seconds = seconds_per_call(lambda: network.print(text_path), 3)
+        results["text_save"] = result(seconds * 1e6, "us", False, seconds)
+        seconds = seconds_per_call(lambda: Cneural_net(text_path), 3)
+        results["text_load"] = result(seconds * 1e6, "us", False, seconds)
+        seconds = seconds_per_call(lambda: save_network(network, binary_path), 3)
+        results["binary_save"] = result(seconds * 1e6, "us", False, seconds)
+        seconds = seconds_per_call(lambda: load_network(binary_path), 3)
+        results["binary_load"] = result(seconds * 1e6, "us", False, seconds)
+        megabytes = parameters.nbytes / 1e6
+        seconds = seconds_per_call(lambda: save_population(parameters, population_path), 3)
+        results["population_save"] = result(megabytes / seconds, "MB/s", True)
+        seconds = seconds_per_call(lambda: load_population(population_path).parameters.sum(), 3)
+        results["population_load"] = result(megabytes / seconds, "MB/s", True)
+    return results
+
+BENCHMARKS = {
+    "engine": bench_engine,
+    "batch_env": bench_batch_env,
+    "game_over": bench_game_over,
+    "set_snack": bench_set_snack,
+    "inference": bench_inference,
+    "q_learning": bench_q_learning,
+    "checkpoint": bench_checkpoint,
+}
+
+#########################################################################################
+#
+#   compare
+#       Parameters: 1. p_results....results of this run
+#                   2. p_baseline...results of an earlier run
+#                   3. p_tolerance..allowed slowdown as a fraction of the baseline
+#
+#       Return: a list of (name, baseline value, value, change) for every result that
+#               got worse by more than p_tolerance (or SHORT_CALL_TOLERANCE if its
+#               call is shorter than SHORT_CALL) and by more than the NOISE_FLOOR of
+#               its unit
+#
+#########################################################################################
+def compare(p_results, p_baseline, p_tolerance):
+    regressions = []
+    for benchmark in p_results["results"]:
+        for name in p_results["results"][benchmark]:
+            before = p_baseline.get("results", {}).get(benchmark, {}).get(name)
+            if before is None or before["value"] == 0:
+                continue
+            now = p_results["results"][benchmark][name]
+            change = now["value"] / before["value"] - 1
+            if now["higher_is_better"]:
+                change = -change
+            now["change"] = change
+            tolerance = p_tolerance
+            if now.get("call_seconds", SHORT_CALL) < SHORT_CALL:
+                tolerance = max(tolerance, SHORT_CALL_TOLERANCE)
+            if change > tolerance and abs(now["value"] - before["value"]) > NOISE_FLOOR.get(now["unit"], 0):
+                regressions.append((benchmark + "." + name, before["value"], now["value"], change))
+    return regressions
+
+#########################################################################################
+#
+#   keep_best
+#       Parameters: 1. p_results...results of 1 benchmark, updated in place
+#                   2. p_rerun.....results of running the same benchmark again
+#
+#       Description: keeps the better value of each result
+#
+#########################################################################################
+def keep_best(p_results, p_rerun):
+    for name, now in p_rerun.items():
+        before = p_results[name]["value"]
+        if (now["value"] > before) == now["higher_is_better"]:
+            p_results[name]["value"] = now["value"]
+
+#########################################################################################
+#
+#   main
+#       Parameters: 1. p_arguments...the command line options, or None for sys.argv
+#
+#       Return: the exit status: 1 if a regression was found, otherwise 0
+#
+#########################################################################################
+def main(p_arguments = None):
+    parser = argparse.ArgumentParser(description="Benchmark the snake engine and networks")
+    parser.add_argument("-o", "--output", help="write the results to this JSON file")
+    parser.add_argument("-b", "--baseline", help="compare to the results in this JSON file")
+    parser.add_argument("-t", "--tolerance", type=float, default=0.15, help="allowed slowdown as a fraction")
+    parser.add_argument("-r", "--reruns", type=int, default=3, help="reruns of benchmarks with a regression")
+    parser.add_argument("-k", "--filter", default="", help="only run benchmarks containing this text")
+    arguments = parser.parse_args(p_arguments)
+
+    results = {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(), "results": {}}
+    for name in BENCHMARKS:
+        if arguments.filter in name:
+            results["results"][name] = BENCHMARKS[name]()
+            for key, value in results["results"][name].items():
+                print(name + "." + key + ": " + format(value["value"], ".4g") + " " + value["unit"])
+
+    status = 0
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline, arguments.tolerance)
+        for rerun in range(arguments.reruns):
+            if not regressions:
+                break
+            for benchmark in dict.fromkeys(name.split(".")[0] for name, before, now, change in regressions):
+                print("rerunning " + benchmark)
+                keep_best(results["results"][benchmark], BENCHMARKS[benchmark]())
+            regressions = compare(results, baseline, arguments.tolerance)
+        for name, before, now, change in regressions:
+            print("REGRESSION " + name + ": " + format(before, ".4g") + " -> " + format(now, ".4g") + " (" + format(change * 100, ".1f") + "% worse)")
+        if regressions:
+            status = 1
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
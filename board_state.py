@@ -0,0 +1,161 @@
+#########################################################################################
+#
+#                                     Board State
+#
+#   Purpose: Stores the body of a snake so that every operation the game needs each
+#            step takes constant time, no matter how long the snake is.
+#
+#   Data structures:
+#       - body.......a deque of the (x,y) location of each snake chunk, head first.
+#                    Adding a head and removing the tail are O(1)
+#       - count......a bytearray with 1 entry per cell of the board, storing how many
+#                    snake chunks are in that cell. Checking if the head ran into the
+#                    body is O(1)
+#       - free.......an array of the cells that are not part of the snake. The first
+#                    n_free entries are free cells, in no particular order
+#       - free_index.the location of each cell in free. A cell is removed from free by
+#                    swapping it with the last free cell, so a random free cell for a
+#                    snack can be chosen in O(1)
+#
+#   Coordinates: locations are (x,y) cells, with (0,0) in the top left corner. Cell
+#                (x,y) is numbered y*cols + x.
+#
+#   Class attributes:
+#       1. cols............the width of the board in cells
+#       2. rows............the height of the board in cells
+#       3. body, count, free, free_index, n_free...see above
+#       4. out_of_bounds...True once the head has left the board
+#
+#   Methods:
+#       - __init__......initializes the board with a snake of 1 chunk
+#       - cell..........converts an (x,y) cell to a cell number
+#       - location......converts a cell number to an (x,y) cell
+#       - push_head.....adds a new head to the snake
+#       - pop_tail......removes the last chunk of the snake
+#       - is_game_over..determines if the head is off the board or inside the body
+#       - sample_free...chooses a random cell that is not part of the snake
+#
+#########################################################################################
+from array import array
+from collections import deque
+
+class Cboard_state:
+
+    #####################################################################################
+    #
+    #   Cboard_state:__init__
+    #       Parameters: 1. p_cols...the width of the board in cells
+    #                   2. p_rows...the height of the board in cells
+    #                   3. p_head...(x,y) cell of the first snake chunk
+    #
+    #####################################################################################
+    def __init__(self, p_cols, p_rows, p_head):
+        self.cols = p_cols
+        self.rows = p_rows
+        num_cells = p_cols * p_rows
+        self.count = bytearray(num_cells)
+        self.free = array("l", range(num_cells))
+        self.free_index = array("l", range(num_cells))
+        self.n_free = num_cells
+        self.out_of_bounds = False
+        self.body = deque()
+        self.push_head(p_head)
+
+    #####################################################################################
+    #
+    #   Cboard_state:cell
+    #       Parameters: 1. p_chunk...an (x,y) cell
+    #
+    #       Returns: the number of p_chunk, or -1 if it is off the board
+    #
+    #####################################################################################
+    def cell(self, p_chunk):
+        x = p_chunk[0]
+        y = p_chunk[1]
+        if x < 0 or y < 0 or x >= self.cols or y >= self.rows:
+            return -1
+        return y * self.cols + x
+
+    #####################################################################################
+    #
+    #   Cboard_state:location
+    #       Parameters: 1. p_cell...a cell number
+    #
+    #       Returns: the (x,y) cell numbered p_cell
+    #
+    #####################################################################################
+    def location(self, p_cell):
+        return (p_cell % self.cols, p_cell // self.cols)
+
+    #####################################################################################
+    #
+    #   Cboard_state:push_head
+    #       Parameters: 1. p_chunk...the (x,y) cell of the new head
+    #
+    #####################################################################################
+    def push_head(self, p_chunk):
+        self.body.appendleft(p_chunk)
+        cell = self.cell(p_chunk)
+        if cell < 0:
+            self.out_of_bounds = True
+            return
+        self.count[cell] = self.count[cell] + 1
+        if self.count[cell] == 1:
+            # swap the cell with the last free cell and shrink the free list
+            index = self.free_index[cell]
+            last = self.free[self.n_free - 1]
+            self.free[index] = last
+            self.free_index[last] = index
+            self.free[self.n_free - 1] = cell
+            self.free_index[cell] = self.n_free - 1
+            self.n_free = self.n_free - 1
+
+    #####################################################################################
+    #
+    #   Cboard_state:pop_tail
+    #       Returns: the (x,y) cell of the removed chunk
+    #
+    #####################################################################################
+    def pop_tail(self):
+        chunk = self.body.pop()
+        cell = self.cell(chunk)
+        if cell < 0:
+            return chunk
+        self.count[cell] = self.count[cell] - 1
+        if self.count[cell] == 0:
+            # the cell is already stored just past the free cells, so swap it there
+            index = self.free_index[cell]
+            first = self.free[self.n_free]
+            self.free[index] = first
+            self.free_index[first] = index
+            self.free[self.n_free] = cell
+            self.free_index[cell] = self.n_free
+            self.n_free = self.n_free + 1
+        return chunk
+
+    #####################################################################################
+    #
+    #   Cboard_state:is_game_over
+    #       Returns: True: if the head is off the board or shares a cell with the body
+    #                False: all other conditions
+    #
+    #####################################################################################
+    def is_game_over(self):
+        if self.out_of_bounds:
+            return True
+        return self.count[self.cell(self.body[0])] > 1
+
+    #####################################################################################
+    #
+    #   Cboard_state:sample_free
+    #       Parameters: 1. p_randrange...a function like random.randrange, returning a
+    #                                    random integer in [0, n)
+    #
+    #       Returns: a random (x,y) cell not in the snake, or None if the snake fills
+    #                the board
+    #
+    #####################################################################################
+    def sample_free(self, p_randrange):
+        if self.n_free == 0:
+            return None
+        return self.location(self.free[p_randrange(self.n_free)])
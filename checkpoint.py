@@ -0,0 +1,150 @@
+#########################################################################################
+#
+#                                      Checkpoints
+#
+#   Purpose: Saves and loads Cneural_net networks in a single binary file each, and
+#            whole populations in 1 packed file, without losing precision.
+#
+#   File format: a standard NumPy .npy file of float64 values in the layout of
+#                Cneural_net.get_parameters.
+#       - network.......shape (NUM_PARAMETERS,)
+#       - population....shape (P, NUM_PARAMETERS), 1 network per row
+#                A population file is memory mapped when it is loaded, and
+#                Cneural_population views the mapped rows directly, so only the
+#                pages that are used are ever read from disk.
+#
+#   Atomic writes: files are written to a temporary file in the same directory and
+#                  renamed over the destination, so a crash never leaves a partly
+#                  written checkpoint behind.
+#
+#   Functions:
+#       - write_atomically..........writes any file through a temporary file
+#       - save_network..............writes 1 network
+#       - load_network..............reads 1 network
+#       - save_population...........writes a (P, NUM_PARAMETERS) matrix
+#       - load_population...........memory maps a population file
+#       - convert_text_network......converts a W_1..B_3 directory to a network file
+#       - convert_text_population...converts a directory of W_1..B_3 directories to a
+#                                   population file
+#
+#########################################################################################
+import os
+import tempfile
+import numpy as np
+from neural_net import Cneural_net, NUM_PARAMETERS
+from neural_population import Cneural_population
+
+#########################################################################################
+#
+#   write_atomically
+#       Parameters: 1. p_path....the destination file
+#                   2. p_write...a function that writes the contents to an open binary
+#                                file
+#
+#       Description: writes to a temporary file in the same directory, then renames it
+#                    to p_path. The temporary file is created private to the owner,
+#                    so it is given the permissions a plain open would, following
+#                    the umask
+#
+#########################################################################################
+def write_atomically(p_path, p_write):
+    directory = os.path.dirname(os.path.abspath(p_path))
+    handle, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as temporary_file:
+            p_write(temporary_file)
+            temporary_file.flush()
+            os.fsync(temporary_file.fileno())
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temporary_path, 0o666 & ~umask)
+        os.replace(temporary_path, p_path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+#########################################################################################
+#
+#   save_array
+#       Parameters: 1. p_array...the array to write
+#                   2. p_path....the destination .npy file
+#
+#########################################################################################
+def save_array(p_array, p_path):
+    array = np.ascontiguousarray(p_array, dtype=np.float64)
+    write_atomically(p_path, lambda p_file: np.save(p_file, array))
+
+#########################################################################################
+#
+#   save_network
+#       Parameters: 1. p_network...a Cneural_net
+#                   2. p_path......the destination .npy file
+#
+#########################################################################################
+def save_network(p_network, p_path):
+    save_array(p_network.get_parameters(), p_path)
+
+#########################################################################################
+#
+#   load_network
+#       Parameters: 1. p_path...a network file written by save_network
+#
+#       Return: a Cneural_net
+#
+#########################################################################################
+def load_network(p_path):
+    return Cneural_net(p_path)
+
+#########################################################################################
+#
+#   save_population
+#       Parameters: 1. p_parameters...(P, NUM_PARAMETERS) matrix, 1 network per row
+#                   2. p_path.........the destination .npy file
+#
+#########################################################################################
+def save_population(p_parameters, p_path):
+    if np.ndim(p_parameters) != 2 or np.shape(p_parameters)[1] != NUM_PARAMETERS:
+        raise ValueError("expected a (P, " + str(NUM_PARAMETERS) + ") matrix, got shape " + str(np.shape(p_parameters)))
+    save_array(p_parameters, p_path)
+
+#########################################################################################
+#
+#   load_population
+#       Parameters: 1. p_path...a population file written by save_population
+#                   2. p_dtype..the precision used for inference. If None the file is
+#                               used in place (float64); otherwise it is copied
+#
+#       Return: a Cneural_population whose tensors view the memory mapped file
+#
+#########################################################################################
+def load_population(p_path, p_dtype = None):
+    parameters = np.load(p_path, mmap_mode="r")
+    return Cneural_population(parameters, p_dtype)
+
+#########################################################################################
+#
+#   convert_text_network
+#       Parameters: 1. p_directory_path...a directory written by Cneural_net.print
+#                   2. p_path.............the destination .npy file
+#
+#########################################################################################
+def convert_text_network(p_directory_path, p_path):
+    save_network(Cneural_net(p_directory_path), p_path)
+
+#########################################################################################
+#
+#   convert_text_population
+#       Parameters: 1. p_archive_path...a directory of directories written by
+#                                       Cneural_net.print
+#                   2. p_path...........the destination .npy file
+#
+#       Return: the names of the converted directories, in the order of their rows
+#
+#########################################################################################
+def convert_text_population(p_archive_path, p_path):
+    names = sorted(name for name in os.listdir(p_archive_path) if os.path.isdir(os.path.join(p_archive_path, name)))
+    parameters = np.empty((len(names), NUM_PARAMETERS))
+    for i in range(len(names)):
+        parameters[i] = Cneural_net(os.path.join(p_archive_path, names[i])).get_parameters()
+    save_population(parameters, p_path)
+    return names
@@ -0,0 +1,151 @@
+#########################################################################################
+#
+#                                 Evolution Strategies
+#
+#   Purpose: Trains Cneural_net snakes with natural evolution strategies (the OpenAI-ES
+#            variant). Instead of breeding a population, 1 parameter vector theta (the
+#            flattened W1, B1, ... B3 of neural_net.LAYERS) is moved along an estimate
+#            of the gradient of the fitness:
+#               1. sampling....P/2 gaussian directions eps are drawn as 1 (P/2, D)
+#                              matrix, and theta + sigma*eps and theta - sigma*eps
+#                              (antithetic pairs) fill the P rows of the Cfitness_pool
+#               2. scoring.....the pool plays every row, batched and optionally in
+#                              worker processes (see fitness.py)
+#               3. ranking.....fitness is replaced by its rank, centered to [-0.5, 0.5],
+#                              so the update ignores the scale of the fitness and a few
+#                              lucky games cannot dominate it
+#               4. update......gradient = sum((w+ - w-) * eps) / (P * sigma), applied
+#                              with momentum and weight decay
+#
+#   Every network the pool plays contributes to the update of theta, which is meant to
+#   reach a given snake length with fewer simulated steps than Cgenetic_trainer. Both
+#   trainers count their cost in pool.total_steps, so they can be compared directly.
+#   The network weights start on a scale of 1, so sigma is much larger than the usual
+#   OpenAI-ES default.
+#
+#   Class attributes: see Ctrainer in trainer.py. pool plays the perturbed networks,
+#                     and rng draws the perturbations. Also:
+#       1. theta............the current (NUM_PARAMETERS,) parameter vector
+#       2. velocity.........the momentum of the update
+#
+#   Methods:
+#       - __init__.......creates a random theta
+#       - prepare........fills the pool with 1 generation of perturbations
+#       - update.........moves theta along the estimated gradient
+#       - gradient.......estimates the gradient from the fitness of the perturbations
+#       - mean_network...returns theta as a Cneural_net
+#       - result_network.....returns mean_network: theta is what ES optimizes, the
+#                            rows of the pool are only noisy samples around it
+#       - result_population..returns theta as a 1 row population
+#       - all other methods are inherited from Ctrainer
+#
+#########################################################################################
+import numpy as np
+from neural_net import Cneural_net, NUM_PARAMETERS
+from trainer import Ctrainer, run_training
+
+class Ces_trainer(Ctrainer):
+
+    #####################################################################################
+    #
+    #   Ces_trainer:__init__
+    #       Parameters: 1. p_size.............the number of networks played each
+    #                                         generation, P (must be even)
+    #                   2. p_seed.............seeds theta, the perturbations and every
+    #                                         game
+    #                   3. p_sigma............standard deviation of the perturbations
+    #                   4. p_learning_rate....step size of the update
+    #                   5. p_momentum.........fraction of the last update kept
+    #                   6. p_weight_decay.....pulls theta toward 0 each update
+    #                   7. p_pool_options.....keyword arguments for Cfitness_pool (board
+    #                                         size, games, workers, ...)
+    #
+    #####################################################################################
+    def __init__(self, p_size = 200, p_seed = 0, p_sigma = 0.3, p_learning_rate = 0.1, p_momentum = 0.9, p_weight_decay = 0.005, **p_pool_options):
+        if p_size < 2 or p_size % 2 != 0:
+            raise ValueError("p_size must be a positive even number, got " + str(p_size))
+        Ctrainer.__init__(self, p_size, p_seed, **p_pool_options)
+        self.sigma = p_sigma
+        self.learning_rate = p_learning_rate
+        self.momentum = p_momentum
+        self.weight_decay = p_weight_decay
+        self.half = p_size // 2
+        self.theta = self.rng.standard_normal(NUM_PARAMETERS)
+        self.velocity = np.zeros(NUM_PARAMETERS)
+        self.noise = np.empty((self.half, NUM_PARAMETERS))
+        self.best_parameters = self.theta.copy()
+
+    #####################################################################################
+    #
+    #   Ces_trainer:prepare
+    #       Description: draws new directions and writes theta + sigma*noise to the
+    #                    first half of the pool and theta - sigma*noise to the second
+    #
+    #####################################################################################
+    def prepare(self):
+        self.rng.standard_normal(out=self.noise)
+        positive = self.pool.parameters[:self.half]
+        negative = self.pool.parameters[self.half:]
+        np.multiply(self.noise, self.sigma, out=positive)
+        np.subtract(self.theta, positive, out=negative)
+        positive += self.theta
+
+    #####################################################################################
+    #
+    #   Ces_trainer:update
+    #       Parameters: 1. p_fitness...the fitness of each perturbed network
+    #
+    #####################################################################################
+    def update(self, p_fitness):
+        self.velocity *= self.momentum
+        self.velocity += self.gradient(p_fitness)
+        self.theta += self.learning_rate * (self.velocity - self.weight_decay * self.theta)
+
+    #####################################################################################
+    #
+    #   Ces_trainer:gradient
+    #       Parameters: 1. p_fitness...the fitness of each row of the pool: theta +
+    #                                  sigma*noise in the first half, theta -
+    #                                  sigma*noise in the second
+    #
+    #       Return: the estimated gradient of the fitness with respect to theta
+    #
+    #####################################################################################
+    def gradient(self, p_fitness):
+        size = len(p_fitness)
+        ranks = np.empty(size)
+        ranks[np.argsort(p_fitness, kind="stable")] = np.arange(size)
+        weights = ranks / (size - 1) - 0.5
+        return (weights[:self.half] - weights[self.half:]) @ self.noise / (size * self.sigma)
+
+    #####################################################################################
+    #
+    #   Ces_trainer:mean_network
+    #       Return: a Cneural_net with the parameters theta
+    #
+    #####################################################################################
+    def mean_network(self):
+        network = Cneural_net("new")
+        network.set_parameters(self.theta)
+        return network
+
+    #####################################################################################
+    #
+    #   Ces_trainer:result_network
+    #       Return: mean_network, the network run_training saves
+    #
+    #####################################################################################
+    def result_network(self):
+        return self.mean_network()
+
+    #####################################################################################
+    #
+    #   Ces_trainer:result_population
+    #       Return: theta as a (1, NUM_PARAMETERS) matrix
+    #
+    #####################################################################################
+    def result_population(self):
+        return self.theta[None, :]
+
+if __name__ == "__main__":
+    run_training(Ces_trainer(), 50, "best_network.npy")
@@ -0,0 +1,214 @@
+#########################################################################################
+#
+#                                    Replay Export
+#
+#   Purpose: Turns recorded games (see replay.py) into image sequences or animated
+#            GIFs without opening a window. Frames are drawn on an offscreen
+#            pygame.Surface with the same Cgame drawing methods used on screen, and
+#            are streamed 1 at a time to the output, so memory use does not depend on
+#            the length of the game.
+#
+#   Display-less machines: the SDL video driver defaults to "dummy" in this module,
+#                          and no window is ever created.
+#
+#   GIF encoding: the game only uses 4 colors, so every frame is written with a fixed
+#                 128 color palette and the LZW "uncompressed" scheme: a clear code
+#                 is written every 126 pixels so every code stays 8 bits wide. The
+#                 file is larger than a fully compressed GIF, but each frame is
+#                 encoded with a few NumPy operations and no dependencies.
+#
+#   Classes:
+#       - Cgif_writer...writes an animated GIF 1 frame at a time
+#
+#   Functions:
+#       - render_frames....yields each frame of a replay as an RGB array
+#       - save_frames......writes frames as a numbered sequence of PNG images
+#       - export_replay....exports 1 replay file to a GIF or an image directory
+#       - export_replays...exports many replay files in parallel processes
+#
+#########################################################################################
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import multiprocessing
+import struct
+import numpy as np
+import pygame
+from game import Cgame
+from replay import Creplay_snake, load_replay
+
+# the colors drawn by Cgame; every other palette entry is unused
+PALETTE = [(0,0,0), (0,0,100), (0,255,0), (255,0,0)]
+PALETTE_SIZE = 128
+CLEAR_CODE = 128
+END_CODE = 129
+PIXELS_PER_CLEAR = 126
+
+#########################################################################################
+#
+#   render_frames
+#       Parameters: 1. p_replay...the Creplay to draw
+#
+#       Description: a generator yielding a (height, width, 3) uint8 array for the
+#                    first position and after every move the snake survives, the same
+#                    frames Crender_observer shows on screen
+#
+#########################################################################################
+def render_frames(p_replay):
+    game = Cgame(p_replay.cols, p_replay.rows, p_replay.block_size)
+    snake = Creplay_snake(p_replay)
+    game.display = pygame.Surface((game.width, game.height))
+    game.start_game(snake, p_replay.seed)
+    end = False
+    while True:
+        game.display.fill((0,0,0))
+        game.print_grid()
+        game.print_snack(snake)
+        game.print_snake(snake)
+        yield pygame.surfarray.array3d(game.display).transpose(1, 0, 2)
+        if game.snack is None or game.steps >= len(p_replay.moves):
+            return
+        if game.step(snake):
+            return
+
+#########################################################################################
+#
+#   save_frames
+#       Parameters: 1. p_frames......an iterable of RGB arrays
+#                   2. p_directory...the directory for the images, created if needed
+#
+#       Return: the number of frames written, as frame_00000.png, frame_00001.png, ...
+#
+#########################################################################################
+def save_frames(p_frames, p_directory):
+    os.makedirs(p_directory, exist_ok=True)
+    count = 0
+    for frame in p_frames:
+        surface = pygame.surfarray.make_surface(frame.transpose(1, 0, 2))
+        pygame.image.save(surface, os.path.join(p_directory, "frame_" + str(count).zfill(5) + ".png"))
+        count = count + 1
+    return count
+
+class Cgif_writer:
+
+    #####################################################################################
+    #
+    #   Cgif_writer:__init__
+    #       Parameters: 1. p_path....the destination file
+    #                   2. p_width...the width of every frame in pixels
+    #                   3. p_height..the height of every frame in pixels
+    #                   4. p_delay...time each frame is shown, in 1/100 of a second
+    #
+    #####################################################################################
+    def __init__(self, p_path, p_width, p_height, p_delay = 10):
+        self.file = open(p_path, "wb")
+        self.width = p_width
+        self.height = p_height
+        self.delay = p_delay
+        palette = np.zeros((PALETTE_SIZE, 3), dtype=np.uint8)
+        palette[:len(PALETTE)] = PALETTE
+        keys = [(r << 16) | (g << 8) | b for r, g, b in PALETTE]
+        self.palette_keys = np.array(sorted(keys))
+        self.palette_index = np.array([keys.index(key) for key in sorted(keys)], dtype=np.uint8)
+        self.file.write(b"GIF89a")
+        # global color table of 2^(6+1) entries with 8 bits per color
+        self.file.write(struct.pack("<HHBBB", p_width, p_height, 0xE6, 0, 0))
+        self.file.write(palette.tobytes())
+        # loop forever
+        self.file.write(b"\x21\xFF\x0BNETSCAPE2.0\x03\x01\x00\x00\x00")
+
+    #####################################################################################
+    #
+    #   Cgif_writer:write
+    #       Parameters: 1. p_frame...a (height, width, 3) uint8 RGB array
+    #
+    #####################################################################################
+    def write(self, p_frame):
+        frame = np.asarray(p_frame, dtype=np.uint32)
+        keys = (frame[:, :, 0] << 16) | (frame[:, :, 1] << 8) | frame[:, :, 2]
+        found = np.minimum(np.searchsorted(self.palette_keys, keys.ravel()), len(self.palette_keys) - 1)
+        pixels = np.where(self.palette_keys[found] == keys.ravel(), self.palette_index[found], 0).astype(np.uint8)
+
+        groups = -(-len(pixels) // PIXELS_PER_CLEAR)
+        codes = np.full((groups, PIXELS_PER_CLEAR + 1), CLEAR_CODE, dtype=np.uint8)
+        padded = np.zeros(groups * PIXELS_PER_CLEAR, dtype=np.uint8)
+        padded[:len(pixels)] = pixels
+        codes[:, 1:] = padded.reshape(groups, PIXELS_PER_CLEAR)
+        codes = codes.ravel()[:len(pixels) + groups]
+        data = np.append(codes, np.uint8(END_CODE))
+
+        blocks = -(-len(data) // 255)
+        chunks = np.zeros((blocks, 256), dtype=np.uint8)
+        chunks[:, 0] = 255
+        chunks[-1, 0] = len(data) - (blocks - 1) * 255
+        filled = np.zeros(blocks * 255, dtype=np.uint8)
+        filled[:len(data)] = data
+        chunks[:, 1:] = filled.reshape(blocks, 255)
+        last = (blocks - 1) * 256 + 1 + int(chunks[-1, 0])
+
+        self.file.write(struct.pack("<BBBBHBB", 0x21, 0xF9, 4, 0, self.delay, 0, 0))
+        self.file.write(struct.pack("<BHHHHB", 0x2C, 0, 0, self.width, self.height, 0))
+        self.file.write(b"\x07")
+        self.file.write(chunks.ravel()[:last].tobytes())
+        self.file.write(b"\x00")
+
+    #####################################################################################
+    #
+    #   Cgif_writer:close
+    #       Description: ends the GIF and closes the file
+    #
+    #####################################################################################
+    def close(self):
+        self.file.write(b"\x3B")
+        self.file.close()
+
+#########################################################################################
+#
+#   export_replay
+#       Parameters: 1. p_replay_path...a file written by replay.save_replay
+#                   2. p_output........a .gif file, or a directory for PNG images
+#                   3. p_delay.........for GIFs, 1/100 seconds per frame (10 matches
+#                                      the 10 steps per second of play_game)
+#
+#       Return: the number of frames written
+#
+#########################################################################################
+def export_replay(p_replay_path, p_output, p_delay = 10):
+    replay = load_replay(p_replay_path)
+    if not p_output.lower().endswith(".gif"):
+        return save_frames(render_frames(replay), p_output)
+    game = Cgame(replay.cols, replay.rows, replay.block_size)
+    writer = Cgif_writer(p_output, game.width, game.height, p_delay)
+    count = 0
+    try:
+        for frame in render_frames(replay):
+            writer.write(frame)
+            count = count + 1
+    finally:
+        writer.close()
+    return count
+
+#########################################################################################
+#
+#   export_job
+#       Parameters: 1. p_job...a (replay path, output) pair
+#
+#       Description: pool task, exports 1 (replay, output) job
+#
+#       Return: the number of frames written
+#
+#########################################################################################
+def export_job(p_job):
+    return export_replay(*p_job)
+
+#########################################################################################
+#
+#   export_replays
+#       Parameters: 1. p_jobs......a list of (replay path, output) pairs
+#                   2. p_workers...the number of processes. If None, 1 per core
+#
+#       Return: the number of frames written for each job
+#
+#########################################################################################
+def export_replays(p_jobs, p_workers = None):
+    with multiprocessing.Pool(p_workers) as pool:
+        return pool.map(export_job, p_jobs)
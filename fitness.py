@@ -0,0 +1,199 @@
+#########################################################################################
+#
+#                                   Fitness Evaluation
+#
+#   Purpose: Scores a population of Cneural_net snakes by playing them in a
+#            Cbatch_env, and shares that work across a pool of processes.
+#
+#   Fitness: each network plays p_games games. A game ends when the snake dies, after
+#            p_max_steps steps, or after p_hunger steps without eating a snack (so
+#            snakes that only circle do not run forever). The fitness of a network is
+#            its average of (snacks eaten + 0.001 * steps survived) over its games.
+#
+#   Shared memory: the (P, NUM_PARAMETERS) parameter matrix, the fitness vector and
+#                  the steps vector live in multiprocessing.shared_memory blocks. Workers attach to
+#                  them once when the pool starts, so each task only sends the rows
+#                  to evaluate and a seed; weights are never pickled.
+#
+#   Reproducibility: the population is split into shards of a fixed size, and shard
+#                    i of an evaluation draws its snacks from a generator seeded
+#                    with (entropy, i). The result does not depend on the number of
+#                    workers or on which worker runs which shard.
+#
+#   Classes:
+#       - Cfitness_pool........owns the shared memory and the worker processes
+#
+#   Functions:
+#       - evaluate_population...plays every network in a parameter matrix
+#       - attach_worker.........pool initializer, attaches to the shared memory
+#       - evaluate_shard........pool task, scores 1 shard of the population
+#
+#########################################################################################
+import multiprocessing
+from multiprocessing import shared_memory
+import os
+import numpy as np
+from batch_env import Cbatch_env
+from neural_net import NUM_PARAMETERS
+from neural_population import Cneural_population
+from vision import Cvision
+
+# the shared arrays and game settings of the current worker process
+WORKER = {}
+
+#########################################################################################
+#
+#   evaluate_population
+#       Parameters: 1. p_parameters...(P, NUM_PARAMETERS) matrix, 1 network per row
+#                   2. p_cols.........the width and height of the board in cells
+#                   3. p_games........the number of games played by each network
+#                   4. p_max_steps....the longest a game may last
+#                   5. p_hunger.......the most steps a snake may go without eating
+#                   6. p_rng..........a numpy Generator used to seed the games
+#                   7. p_steps........if given, the number of steps each network played
+#                                     in all of its games is written here
+#
+#       Return: the fitness of each network
+#
+#########################################################################################
+def evaluate_population(p_parameters, p_cols, p_games, p_max_steps, p_hunger, p_rng, p_steps = None):
+    population = Cneural_population(p_parameters)
+    vision = Cvision(population.size, p_cols)
+    env = Cbatch_env(population.size, p_cols, p_seed=p_rng.integers(2**63))
+    fitness = np.zeros(population.size)
+    steps = np.zeros(population.size)
+    hunger = np.zeros(population.size, dtype=np.int64)
+    for game in range(p_games):
+        if game > 0:
+            env.rng = np.random.default_rng(p_rng.integers(2**63))
+            env.reset()
+        hunger[:] = 0
+        for step in range(p_max_steps):
+            actions = population.feed_forward(vision.encode_env(env)).argmax(axis=1)
+            eaten = env.step(actions)
+            hunger += 1
+            hunger[eaten] = 0
+            env.alive[hunger >= p_hunger] = False
+            if not env.alive.any():
+                break
+        fitness += (env.length - 1) + 0.001 * env.steps
+        steps += env.steps
+    if p_steps is not None:
+        p_steps[:] = steps
+    return fitness / p_games
+
+#########################################################################################
+#
+#   attach_worker
+#       Parameters: 1. p_parameter_name...name of the shared parameter matrix
+#                   2. p_fitness_name.....name of the shared block holding the fitness
+#                                         and steps vectors
+#                   3. p_size.............the number of networks, P
+#                   4. p_settings.........(cols, games, max_steps, hunger)
+#
+#       Description: maps the shared memory into numpy arrays stored in WORKER
+#
+#########################################################################################
+def attach_worker(p_parameter_name, p_fitness_name, p_size, p_settings):
+    WORKER["parameter_memory"] = shared_memory.SharedMemory(name=p_parameter_name)
+    WORKER["fitness_memory"] = shared_memory.SharedMemory(name=p_fitness_name)
+    WORKER["parameters"] = np.ndarray((p_size, NUM_PARAMETERS), dtype=np.float64, buffer=WORKER["parameter_memory"].buf)
+    results = np.ndarray((2, p_size), dtype=np.float64, buffer=WORKER["fitness_memory"].buf)
+    WORKER["fitness"] = results[0]
+    WORKER["steps"] = results[1]
+    WORKER["settings"] = p_settings
+
+#########################################################################################
+#
+#   evaluate_shard
+#       Parameters: 1. p_task...(start, end, entropy, shard): scores rows start to end
+#                               with a generator seeded by (entropy, shard)
+#
+#########################################################################################
+def evaluate_shard(p_task):
+    start, end, entropy, shard = p_task
+    cols, games, max_steps, hunger = WORKER["settings"]
+    rng = np.random.default_rng(np.random.SeedSequence(list(entropy) + [shard]))
+    WORKER["fitness"][start:end] = evaluate_population(WORKER["parameters"][start:end], cols, games, max_steps, hunger, rng, WORKER["steps"][start:end])
+
+class Cfitness_pool:
+
+    #####################################################################################
+    #
+    #   Cfitness_pool:__init__
+    #       Parameters: 1. p_size.........the number of networks, P
+    #                   2. p_cols.........the width and height of the board in cells
+    #                   3. p_games........the number of games played by each network
+    #                   4. p_max_steps....the longest a game may last
+    #                   5. p_hunger.......the most steps a snake may go without eating
+    #                   6. p_workers......the number of processes. If None, 1 per core.
+    #                                     If 1, shards are evaluated in this process
+    #                   7. p_shard_size...the number of networks in each task
+    #
+    #       Description: allocates the shared memory and starts the worker processes.
+    #                    self.parameters is the (P, NUM_PARAMETERS) matrix the workers
+    #                    read, so callers write each population into it in place.
+    #                    After each evaluation self.steps holds the steps played by
+    #                    each network, and self.total_steps counts the steps of every
+    #                    evaluation so far, the cost of training
+    #
+    #####################################################################################
+    def __init__(self, p_size, p_cols = 20, p_games = 2, p_max_steps = 2000, p_hunger = 200, p_workers = None, p_shard_size = 16):
+        if p_workers is None:
+            p_workers = os.cpu_count()
+        self.size = p_size
+        self.shard_size = p_shard_size
+        self.parameter_memory = shared_memory.SharedMemory(create=True, size=p_size * NUM_PARAMETERS * 8)
+        self.fitness_memory = shared_memory.SharedMemory(create=True, size=2 * p_size * 8)
+        self.parameters = np.ndarray((p_size, NUM_PARAMETERS), dtype=np.float64, buffer=self.parameter_memory.buf)
+        results = np.ndarray((2, p_size), dtype=np.float64, buffer=self.fitness_memory.buf)
+        self.fitness = results[0]
+        self.steps = results[1]
+        self.total_steps = 0
+        initargs = (self.parameter_memory.name, self.fitness_memory.name, p_size, (p_cols, p_games, p_max_steps, p_hunger))
+        if p_workers > 1:
+            self.pool = multiprocessing.Pool(p_workers, initializer=attach_worker, initargs=initargs)
+        else:
+            self.pool = None
+            attach_worker(*initargs)
+
+    #####################################################################################
+    #
+    #   Cfitness_pool:evaluate
+    #       Parameters: 1. p_entropy...a tuple of integers seeding this evaluation, for
+    #                                  example (seed, generation)
+    #
+    #       Return: a copy of the fitness of every row of self.parameters
+    #
+    #####################################################################################
+    def evaluate(self, p_entropy):
+        tasks = []
+        for shard, start in enumerate(range(0, self.size, self.shard_size)):
+            tasks.append((start, min(start + self.shard_size, self.size), tuple(p_entropy), shard))
+        if self.pool is not None:
+            self.pool.map(evaluate_shard, tasks)
+        else:
+            for task in tasks:
+                evaluate_shard(task)
+        self.total_steps = self.total_steps + int(self.steps.sum())
+        return self.fitness.copy()
+
+    #####################################################################################
+    #
+    #   Cfitness_pool:close
+    #       Description: stops the workers and frees the shared memory
+    #
+    #####################################################################################
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        WORKER.clear()
+        del self.parameters
+        del self.fitness
+        del self.steps
+        self.parameter_memory.close()
+        self.parameter_memory.unlink()
+        self.fitness_memory.close()
+        self.fitness_memory.unlink()
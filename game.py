@@ -6,41 +6,68 @@
 #
 #   Purpose: Allow for the game to be played by any snake object
 #
+#   Coordinates: the game is played on a board of cols by rows cells and every
+#                location (snake chunks and the snack) is an integer (x,y) cell. The
+#                block_size only matters when the board is drawn: cell (x,y) is drawn
+#                at pixel (x*block_size, y*block_size).
+#
+#   Imports: pygame is only imported by the print methods, the first time a board is
+#            drawn. Headless games and worker processes load only NumPy.
+#
 #   Class attributes:
-#       1. board_size...the size of the game board
-#       2. block_size...the size of one block
-#       3. snack........a tuple that stores the (x,y) coordinates of the snack
+#       1. cols.........the width of the game board in cells
+#       2. rows.........the height of the game board in cells
+#       3. block_size...the size of one block in pixels when the board is drawn
+#       4. width........the width of the drawn board in pixels
+#       5. height.......the height of the drawn board in pixels
+#       6. snack........a tuple that stores the (x,y) cell of the snack
+#       7. seeds........a numpy Generator that chooses the seed of each game
+#       8. game_seed....the seed of the current game
+#       9. rng..........the numpy Generator that places the snacks of the current game
+#       10. profiler....a Cprofiler (see profiler.py) timing every step, or None
+#       11. cause.......why the current game ended, with the codes of batch_env.py:
+#                       ALIVE (not over), WALL, SELF or FULL (the snake fills the board)
 #
 #   Methods:
 #       - __init__......initializes the game board
 #       - game_over.....determines when the game is over
 #       - print_snake...prints the snake to the screen
+#       - print_chunk...prints 1 chunk of the snake to the screen
 #       - print_snack...prints the snack to the screen
 #       - print_grid....prints gridlines on the board
+#       - start_game....seeds the random generator and places the first snack
+#       - step..........advances the game by 1 move of the snake
+#       - profiled_step.step, timing each phase with self.profiler
 #       - play_game.....plays 1 full round of the game
 #
 #       - set_snack.....determines the location of the snack
 #       - valid_board...determines if the board dimensions and block size are valid inputs
+#       - randrange.....returns a random integer from the current game's generator
 #
 #########################################################################################
-from snake_human import Csnake_human
-#from snake_network import Csnake_network
-import pygame
-import random
-import time
+from numbers import Integral
+import numpy as np
+from batch_env import ALIVE, WALL, SELF, FULL
 
 class Cgame:
     #####################################################################################
     #
     #   Cgame:__init__
-    #       Parameters: 1. p_size.........sets the size of the game board
-    #                   2. p_snake_size...sets the size of a snake chunk
+    #       Parameters: 1. p_cols.........the width of the game board in cells
+    #                   2. p_rows.........the height of the game board in cells
+    #                   3. p_block_size...the size of a snake chunk in pixels when the
+    #                                     board is drawn
+    #                   4. p_seed.........seeds every game played on this board. If
+    #                                     None, a random seed is used
     #
     #       Description: Assigns member variables
     #
     #####################################################################################
-    def __init__(self, p_size, p_snake_size):
-        self.valid_board(p_size,p_snake_size)
+    def __init__(self, p_cols, p_rows, p_block_size = 25, p_seed = None):
+        self.valid_board(p_cols, p_rows, p_block_size)
+        self.profiler = None
+        self.seeds = np.random.default_rng(p_seed)
+        self.start_game(None)
 
     #####################################################################################
     #
@@ -50,15 +77,25 @@ class Cgame:
     #       Returns: True: if the snake is out of bounds or has eaten itself
     #                False: all other conditions
     #
+    #       Description: also sets self.cause to WALL or SELF when the game is over
+    #
     #####################################################################################
     def game_over(self, p_snake):
+        board = getattr(p_snake, "board", None)
+        if board is not None:
+            if board.is_game_over():
+                self.cause = WALL if board.out_of_bounds else SELF
+                return True
+            return False
         head = p_snake.get_position()[0]
-        if head[0] < 0 or head[1] < 0 or head[0] >= self.board_size or head[1] >= self.board_size:
+        if head[0] < 0 or head[1] < 0 or head[0] >= self.cols or head[1] >= self.rows:
+            self.cause = WALL
             return True
         is_head = True
         for chunk in p_snake.get_position():
             if chunk == head and not is_head:
                 #print("exit  2")
+                self.cause = SELF
                 return True
             if is_head:
                 is_head = False
@@ -74,17 +111,29 @@ class Cgame:
     #
     #####################################################################################
     def print_snake(self, p_snake):
-        green  = (0,255,0)
-        print(p_snake.get_size(), end = ": ")
+        import pygame
         for chunk in p_snake.get_position():
             assert(isinstance(chunk,tuple))
-            pygame.draw.circle(self.display, green, (int(chunk[0]+(self.block_size/2)), int(chunk[1]+(self.block_size/2))), int(self.block_size/2))#, int(self.block_size)])
-            print("("+str(chunk[0])+","+str(chunk[1])+") ", end = "")
-        print("")
+            self.print_chunk(chunk)
         # vision lines
         red = (255,0,0)
-        pygame.draw.line(self.display, red, (p_snake.get_position()[0][0]+(self.block_size/2),0), (p_snake.get_position()[0][0]+(self.block_size/2), self.board_size))
-        pygame.draw.line(self.display, red, (0, p_snake.get_position()[0][1]+(self.block_size/2)), (self.board_size, p_snake.get_position()[0][1]+(self.block_size/2)))
+        head_x = p_snake.get_position()[0][0]*self.block_size+(self.block_size/2)
+        head_y = p_snake.get_position()[0][1]*self.block_size+(self.block_size/2)
+        pygame.draw.line(self.display, red, (head_x,0), (head_x, self.height))
+        pygame.draw.line(self.display, red, (0, head_y), (self.width, head_y))
+
+    #####################################################################################
+    #
+    #   Cgame:print_chunk
+    #       Parameters: 1. p_chunk...the (x,y) cell of 1 snake chunk
+    #
+    #       Description: prints 1 green circle of the snake
+    #
+    #####################################################################################
+    def print_chunk(self, p_chunk):
+        import pygame
+        green  = (0,255,0)
+        pygame.draw.circle(self.display, green, (int(p_chunk[0]*self.block_size+(self.block_size/2)), int(p_chunk[1]*self.block_size+(self.block_size/2))), int(self.block_size/2))#, int(self.block_size)])
 
     #####################################################################################
     #
@@ -92,15 +141,16 @@ class Cgame:
     #       Parameters: 1. p_snake...used to get snake.position
     #
     #       Description: prints a red square with a length defined by block_size at the 
-    #                    location of the snack
+    #                    location of the snack. Nothing is drawn if the snake fills
+    #                    the board
     #
     #####################################################################################
     def print_snack(self, p_snake):
+        if self.snack is None:
+            return
+        import pygame
         red = (255,0,0)
-        print("snack: ("+str(self.snack[0])+","+str(self.snack[1])+") ", end = "")
-        if p_snake.get_position()[0] == self.snack:
-            self.set_snack(p_snake)
-        pygame.draw.rect(self.display, red, [self.snack[0], self.snack[1], self.block_size, self.block_size])
+        pygame.draw.rect(self.display, red, [self.snack[0]*self.block_size, self.snack[1]*self.block_size, self.block_size, self.block_size])
 
     #####################################################################################
     #
@@ -113,98 +163,221 @@ class Cgame:
     #
     #####################################################################################
     def print_grid(self):
+        import pygame
         line_color = (0,0,100)
         step = 0
-        while step <= self.board_size:
-            pygame.draw.line(self.display, line_color, (0, step), (self.board_size, step))
-            pygame.draw.line(self.display, line_color, (step, 0), (step, self.board_size))
+        while step <= self.height:
+            pygame.draw.line(self.display, line_color, (0, step), (self.width, step))
+            step = step + self.block_size
+        step = 0
+        while step <= self.width:
+            pygame.draw.line(self.display, line_color, (step, 0), (step, self.height))
             step = step + self.block_size
 
+    #####################################################################################
+    #
+    #   Cgame:start_game
+    #       Parameters: 1. p_snake...the snake object to be used in the game, or None to
+    #                                only seed the game
+    #                   2. p_seed....the seed of the game. If None, the next seed is
+    #                                drawn from self.seeds
+    #
+    #       Description: every game has its own seed, so any game can be played again
+    #                    exactly by passing its game_seed back in (see replay.py)
+    #
+    #####################################################################################
+    def start_game(self, p_snake, p_seed = None):
+        if p_seed is None:
+            p_seed = int(self.seeds.integers(2**63))
+        self.game_seed = p_seed
+        self.rng = np.random.default_rng(p_seed)
+        self.steps = 0
+        self.cause = ALIVE
+        if p_snake is not None:
+            self.set_snack(p_snake)
+
+    #####################################################################################
+    #
+    #   Cgame:step
+    #       Parameters: 1. p_snake...the snake object to be moved
+    #
+    #       Returns: True: if the move ended the game (the snake died or filled the
+    #                      board)
+    #                False: all other conditions
+    #
+    #       Description: moves the snake once, places a new snack if it was eaten and
+    #                    counts the step in self.steps. This is the entire set of game
+    #                    rules, nothing is drawn or printed.
+    #
+    #####################################################################################
+    def step(self, p_snake):
+        if self.profiler is not None:
+            return self.profiled_step(p_snake)
+        self.steps = self.steps + 1
+        p_snake.move(self.snack)
+        if self.game_over(p_snake):
+            return True
+        if p_snake.get_position()[0] == self.snack:
+            self.set_snack(p_snake)
+        return self.snack is None
+
+    #####################################################################################
+    #
+    #   Cgame:profiled_step
+    #       Parameters: 1. p_snake...the snake object to be moved
+    #
+    #       Returns: the same as step
+    #
+    #       Description: the rules of step, split into the controller, physics and
+    #                    snack phases of self.profiler. Kept separate from step so
+    #                    unprofiled games do not pay for the timers
+    #
+    #####################################################################################
+    def profiled_step(self, p_snake):
+        profiler = self.profiler
+        self.steps = self.steps + 1
+        profiler.count("steps")
+        start = profiler.begin()
+        p_snake.steer(self.snack)
+        start = profiler.end("controller", start)
+        p_snake.advance(self.snack)
+        over = self.game_over(p_snake)
+        start = profiler.end("physics", start)
+        if over:
+            profiler.emit("death", self, p_snake)
+            return True
+        if p_snake.get_position()[0] == self.snack:
+            self.set_snack(p_snake)
+            profiler.end("snack", start)
+            profiler.count("snacks")
+            profiler.emit("snack", self, p_snake)
+        if self.snack is None:
+            return True
+        profiler.emit("step", self, p_snake)
+        return False
+
     #####################################################################################
     #
     #   Cgame:play_game
-    #       Parameters: 1. p_snake...the snake object to be used in the game
+    #       Parameters: 1. p_snake.......the snake object to be used in the game
+    #                   2. p_observers...objects notified at the start of the game,
+    #                                    after every step and at the end of the game
+    #                                    (see observers.py). If None, the game is
+    #                                    drawn, printed and run at 10 steps per second.
+    #                                    If empty, the game runs headless.
+    #                   3. p_max_steps...ends the game after this many steps. If None,
+    #                                    the game runs until the snake dies
+    #                   4. p_seed........the seed of the game (see start_game)
     #
-    #       Description: playes 1 full round of the snake game until the snake dies
+    #       Description: playes 1 full round of the snake game until the snake dies.
+    #                    A snake that already fills the board ends the game before the
+    #                    first step
     #
     #####################################################################################
-    def play_game(self, p_snake):
-        self.display = pygame.display.set_mode((self.board_size, self.board_size))
-        pygame.display.set_caption('Snake Game')
-        clock = pygame.time.Clock()
-        end = False
-        self.set_snack(p_snake)
-        self.print_snake(p_snake)
-        self.print_snack(p_snake)
-        self.print_grid()
-        pygame.display.update()
+    def play_game(self, p_snake, p_observers = None, p_max_steps = None, p_seed = None):
+        if p_observers is None:
+            from observers import Crender_observer, Ctick_observer, Clog_observer
+            p_observers = [Crender_observer(), Ctick_observer(10), Clog_observer()]
+        self.start_game(p_snake, p_seed)
+        end = self.snack is None
+        if self.profiler is not None:
+            self.profiler.emit("start", self, p_snake)
+        for observer in p_observers:
+            observer.start(self, p_snake)
         while not end:
-            p_snake.move(self.snack)
-            end = self.game_over(p_snake)
+            end = self.step(p_snake)
             if not end:
-                black = (0,0,0)
-                self.display.fill(black)
-                self.print_grid()
-                self.print_snack(p_snake)
-                self.print_snake(p_snake)
-            pygame.display.update()
-            clock.tick(10)
-        print("Game Over")
+                for observer in p_observers:
+                    observer.update(self, p_snake)
+                if p_max_steps is not None and self.steps >= p_max_steps:
+                    end = True
+        for observer in p_observers:
+            observer.end(self, p_snake)
+        if self.profiler is not None:
+            self.profiler.emit("end", self, p_snake)
         return p_snake.get_size()
 
     #####################################################################################
     #
     #   Cgame:valid_board
-    #       Parameters: 1. p_board_size
-    #                   2. p_block_size
+    #       Parameters: 1. p_cols
+    #                   2. p_rows
+    #                   3. p_block_size
     #
     #       Description: if the sizes are valid according to the rules below, then the 
     #                    game is initialized with the input parameters. Otherwise the 
-    #                    board_size is set to 800 and the block_size is set to 25
+    #                    board is set to 32 by 32 cells and the block_size is set to 25
     #
     #       Note: a valid board must:
-    #           1. have a board size > block size
-    #           2. have a board size that is an integer multiple of block size
-    #           3. have a board size < than 800 (otherwise it won't fit on my screen)
+    #           1. have a whole number of at least 1 cells in each direction
+    #           2. have a whole number of at least 1 pixels per block
+    #           The board may be any size and does not have to be square; games that
+    #           are not drawn can use boards far larger than a screen
     #           Similar rules apply to snake objects
     #
     #####################################################################################
-    def valid_board(self, p_board_size, p_block_size):
+    def valid_board(self, p_cols, p_rows, p_block_size):
         valid_parameters = True
-        if p_board_size > 800:
-            valid_parameters = False
-        counter = 0
-        while counter != p_board_size and valid_parameters:
-            counter = counter + p_block_size
-            if counter > p_board_size:
+        for size in [p_cols, p_rows, p_block_size]:
+            if not isinstance(size, Integral) or size < 1:
                 valid_parameters = False
         if valid_parameters:
+            self.cols = p_cols
+            self.rows = p_rows
             self.block_size = p_block_size
-            self.board_size = p_board_size
         else:
+            self.cols = 32
+            self.rows = 32
             self.block_size = 25
-            self.board_size = 800
+        self.width = self.cols * self.block_size
+        self.height = self.rows * self.block_size
 
     #####################################################################################
     #
     #   Cgame:set_snack
     #       Parameters: 1. p_snake
     #
-    #       Description: places a snack in an appropriate location
+    #       Description: places a snack in an appropriate location. Snakes with a board
+    #                    (see board_state.py) choose from their free cells directly;
+    #                    other snakes are checked chunk by chunk, and every rejected
+    #                    location is counted as a snack_reroll by self.profiler. If the
+    #                    snake fills the whole board, the snack is set to None and
+    #                    self.cause to FULL
     #
     #####################################################################################
     def set_snack(self, p_snake):
-        blocks_per_side = self.board_size/self.block_size
+        board = getattr(p_snake, "board", None)
+        if board is not None:
+            self.snack = board.sample_free(self.randrange)
+            if self.snack is None:
+                self.cause = FULL
+            return
         in_snake = True
         while in_snake:
             in_snake = False
-            self.snack = (round(random.randrange(0,blocks_per_side))*self.block_size,round(random.randrange(0,blocks_per_side))*self.block_size)
+            self.snack = (self.randrange(self.cols),self.randrange(self.rows))
             for chunk in p_snake.get_position():
                 if chunk == self.snack:
                     in_snake = True
+            if in_snake and self.profiler is not None:
+                self.profiler.count("snack_rerolls")
+
+    #####################################################################################
+    #
+    #   Cgame:randrange
+    #       Parameters: 1. p_stop
+    #
+    #       Returns: a random integer in [0, p_stop) from the current game's generator
+    #
+    #####################################################################################
+    def randrange(self, p_stop):
+        return int(self.rng.integers(p_stop))
+
+if __name__ == "__main__":
+    from snake_human import Csnake_human
+    cols = 32
+    rows = 32
+    game_board = Cgame(cols, rows, 25)#,500)
+    joshua = Csnake_human(cols, rows)
+    game_board.play_game(joshua)
 
-board_size = 782
-p_block_size = 27
-game_board = Cgame(board_size, p_block_size)#,500)
-joshua = Csnake_human(board_size, p_block_size)
-game_board.play_game(joshua)
@@ -0,0 +1,90 @@
+#########################################################################################
+#
+#                                   Genetic Trainer
+#
+#   Purpose: Trains Cneural_net snakes with a genetic algorithm. Every generation the
+#            population is scored by a Cfitness_pool (see fitness.py), then the next
+#            generation is built from it:
+#               1. elitism.....the best p_elite networks are copied unchanged
+#               2. selection...each parent is the fittest of p_tournament networks
+#                              chosen at random
+#               3. crossover...each weight of a child comes from either parent with
+#                              equal probability
+#               4. mutation....each weight of a child is changed by gaussian noise
+#                              with probability p_mutation_rate
+#
+#   Class attributes: see Ctrainer in trainer.py. pool holds the population, and rng
+#                     is used for selection and mutation
+#
+#   Methods:
+#       - __init__.......creates a random population
+#       - update.........replaces the population with the next generation
+#       - evolve.........builds the next generation from the current one
+#       - all other methods are inherited from Ctrainer
+#
+#########################################################################################
+import numpy as np
+from neural_net import NUM_PARAMETERS
+from trainer import Ctrainer, run_training
+
+class Cgenetic_trainer(Ctrainer):
+
+    #####################################################################################
+    #
+    #   Cgenetic_trainer:__init__
+    #       Parameters: 1. p_size............the number of networks in each generation
+    #                   2. p_seed............seeds the population, the genetic
+    #                                        operators and every game
+    #                   3. p_elite...........networks copied into the next generation
+    #                   4. p_tournament......networks compared to select each parent
+    #                   5. p_mutation_rate...probability that a weight is mutated
+    #                   6. p_mutation_scale..standard deviation of a mutation
+    #                   7. p_pool_options....keyword arguments for Cfitness_pool (board
+    #                                        size, games, workers, ...)
+    #
+    #####################################################################################
+    def __init__(self, p_size = 200, p_seed = 0, p_elite = 4, p_tournament = 4, p_mutation_rate = 0.05, p_mutation_scale = 0.5, **p_pool_options):
+        Ctrainer.__init__(self, p_size, p_seed, **p_pool_options)
+        self.elite = p_elite
+        self.tournament = p_tournament
+        self.mutation_rate = p_mutation_rate
+        self.mutation_scale = p_mutation_scale
+        self.pool.parameters[:] = self.rng.standard_normal((p_size, NUM_PARAMETERS))
+        self.best_parameters = self.pool.parameters[0].copy()
+
+    #####################################################################################
+    #
+    #   Cgenetic_trainer:update
+    #       Parameters: 1. p_fitness...the fitness of each network in the population
+    #
+    #####################################################################################
+    def update(self, p_fitness):
+        self.pool.parameters[:] = self.evolve(self.pool.parameters, p_fitness)
+
+    #####################################################################################
+    #
+    #   Cgenetic_trainer:evolve
+    #       Parameters: 1. p_parameters...(P, NUM_PARAMETERS) matrix of the population
+    #                   2. p_fitness......the fitness of each network
+    #
+    #       Return: a new (P, NUM_PARAMETERS) matrix for the next generation
+    #
+    #####################################################################################
+    def evolve(self, p_parameters, p_fitness):
+        size = p_parameters.shape[0]
+        children = size - self.elite
+        next_generation = np.empty_like(p_parameters)
+        next_generation[:self.elite] = p_parameters[np.argsort(-p_fitness)[:self.elite]]
+
+        candidates = self.rng.integers(0, size, (2, children, self.tournament))
+        winners = np.take_along_axis(candidates, p_fitness[candidates].argmax(axis=2)[:, :, None], axis=2)[:, :, 0]
+
+        from_first = self.rng.random((children, NUM_PARAMETERS)) < 0.5
+        child = np.where(from_first, p_parameters[winners[0]], p_parameters[winners[1]])
+        mutate = self.rng.random((children, NUM_PARAMETERS)) < self.mutation_rate
+        child += mutate * self.rng.normal(0, self.mutation_scale, (children, NUM_PARAMETERS))
+        next_generation[self.elite:] = child
+        return next_generation
+
+if __name__ == "__main__":
+    run_training(Cgenetic_trainer(), 50, "best_network.npy", "population.npy")
@@ -0,0 +1,183 @@
+#########################################################################################
+#
+#                                   Command Line Tool
+#
+#   Purpose: 1 entry point for every way of running the game. Each command imports
+#            only the modules it needs, so headless commands never load pygame.
+#
+#   Usage: python main.py <command> [options]
+#       play.....play the game with the arrow keys
+#       watch....watch a saved network play (--headless prints the score instead)
+#       replay...play a replay file again
+#       export...turn a replay file into a GIF or a directory of PNG images
+#       train....train networks with the genetic trainer or evolution strategies
+#       serve....host games over TCP (options are passed to server.py)
+#       bench....run the benchmarks (options are passed to bench.py)
+#       tournament...compare controllers over many seeded games (options are passed to
+#                    tournament.py)
+#
+#   Functions:
+#       - observers.........the observers for a game shown in a window
+#       - play_and_record...plays 1 game, saving a replay if asked
+#       - main..............parses the command line and runs the command
+#       - 1 function per command, named after the command
+#
+#########################################################################################
+import argparse
+import sys
+
+#########################################################################################
+#
+#   observers
+#       Parameters: 1. p_arguments...the parsed command line
+#
+#       Return: the observers for Cgame.play_game: none if --headless, otherwise a
+#               window limited to --fps steps per second, printing the game if --log.
+#               With --dirty the window repaints only the cells that changed
+#
+#########################################################################################
+def observers(p_arguments):
+    if getattr(p_arguments, "headless", False):
+        return []
+    from observers import Crender_observer, Cdirty_render_observer, Ctick_observer, Clog_observer
+    if p_arguments.dirty:
+        result = [Cdirty_render_observer(), Ctick_observer(p_arguments.fps)]
+    else:
+        result = [Crender_observer(), Ctick_observer(p_arguments.fps)]
+    if p_arguments.log:
+        result.append(Clog_observer())
+    return result
+
+#########################################################################################
+#
+#   play_and_record
+#       Parameters: 1. p_arguments...the parsed command line
+#                   2. p_snake.......the snake to play
+#
+#       Description: plays 1 game on a --cols by --rows board, saving it to --record
+#                    if given
+#
+#########################################################################################
+def play_and_record(p_arguments, p_snake):
+    from game import Cgame
+    game = Cgame(p_arguments.cols, p_arguments.rows, p_arguments.block, p_arguments.seed)
+    game_observers = observers(p_arguments)
+    recorder = None
+    if p_arguments.record:
+        from replay import Creplay_recorder
+        recorder = Creplay_recorder()
+        game_observers.append(recorder)
+    size = game.play_game(p_snake, game_observers, p_arguments.max_steps)
+    print("size: " + str(size) + " steps: " + str(game.steps) + " seed: " + str(game.game_seed))
+    if recorder is not None:
+        from replay import save_replay
+        save_replay(recorder.replay, p_arguments.record)
+
+def play(p_arguments):
+    from snake_human import Csnake_human
+    play_and_record(p_arguments, Csnake_human(p_arguments.cols, p_arguments.rows))
+
+def watch(p_arguments):
+    from neural_net import Cneural_net
+    from snake_network import Csnake_network
+    network = Cneural_net(p_arguments.network)
+    play_and_record(p_arguments, Csnake_network(p_arguments.cols, p_arguments.rows, network))
+
+def replay(p_arguments):
+    from replay import load_replay, play_replay
+    size = play_replay(load_replay(p_arguments.replay), observers(p_arguments))
+    print("size: " + str(size))
+
+def export(p_arguments):
+    from export import export_replay
+    count = export_replay(p_arguments.replay, p_arguments.output, p_arguments.delay)
+    print(str(count) + " frames written to " + p_arguments.output)
+
+def train(p_arguments):
+    from trainer import run_training
+    if p_arguments.method == "es":
+        from es import Ces_trainer as Ctrainer
+    else:
+        from genetic_trainer import Cgenetic_trainer as Ctrainer
+    trainer = Ctrainer(p_arguments.size, p_arguments.seed, p_cols=p_arguments.cols, p_workers=p_arguments.workers)
+    run_training(trainer, p_arguments.generations, p_arguments.output, p_arguments.population)
+
+def serve(p_arguments):
+    import server
+    server.main(p_arguments.options)
+
+def bench(p_arguments):
+    import bench
+    return bench.main(p_arguments.options)
+
+def tournament(p_arguments):
+    import tournament
+    tournament.main(p_arguments.options)
+
+def add_board_options(p_parser):
+    p_parser.add_argument("--cols", type=int, default=32, help="board width in cells")
+    p_parser.add_argument("--rows", type=int, default=None, help="board height in cells (default: --cols)")
+    p_parser.add_argument("--block", type=int, default=25, help="pixels per cell when drawn")
+    p_parser.add_argument("--seed", type=int, default=None)
+    p_parser.add_argument("--max-steps", type=int, default=None)
+    p_parser.add_argument("--record", help="save the game to this replay file")
+
+def add_window_options(p_parser):
+    p_parser.add_argument("--fps", type=int, default=10, help="steps per second")
+    p_parser.add_argument("--log", action="store_true", help="print the snake every step")
+    p_parser.add_argument("--dirty", action="store_true", help="repaint only the cells that change (no vision lines)")
+
+def main(p_arguments = None):
+    parser = argparse.ArgumentParser(description="Snake game, networks and tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("play", help="play with the arrow keys")
+    add_board_options(command)
+    add_window_options(command)
+    command.set_defaults(run=play)
+
+    command = commands.add_parser("watch", help="watch a saved network play")
+    command.add_argument("network", help="a .npy network or a directory of text weights")
+    add_board_options(command)
+    add_window_options(command)
+    command.add_argument("--headless", action="store_true", help="do not open a window")
+    command.set_defaults(run=watch)
+
+    command = commands.add_parser("replay", help="play a replay file again")
+    command.add_argument("replay")
+    add_window_options(command)
+    command.add_argument("--headless", action="store_true", help="do not open a window")
+    command.set_defaults(run=replay)
+
+    command = commands.add_parser("export", help="write a replay as a GIF or PNG images")
+    command.add_argument("replay")
+    command.add_argument("output", help="a .gif file, or a directory for PNG images")
+    command.add_argument("--delay", type=int, default=10, help="GIF frame time in 1/100 seconds")
+    command.set_defaults(run=export)
+
+    command = commands.add_parser("train", help="train networks")
+    command.add_argument("--method", choices=["ga", "es"], default="ga", help="genetic algorithm or evolution strategies")
+    command.add_argument("--generations", type=int, default=50)
+    command.add_argument("--size", type=int, default=200, help="networks per generation")
+    command.add_argument("--cols", type=int, default=20, help="board width in cells")
+    command.add_argument("--seed", type=int, default=0)
+    command.add_argument("--workers", type=int, default=None, help="processes (default: 1 per core)")
+    command.add_argument("--output", default="best_network.npy")
+    command.add_argument("--population", help="also save the final population (the ES mean for --method es) here")
+    command.set_defaults(run=train)
+
+    for name, run, module in [("serve", serve, "server.py"), ("bench", bench, "bench.py"), ("tournament", tournament, "tournament.py")]:
+        command = commands.add_parser(name, help="see python " + module + " --help", add_help=False)
+        command.set_defaults(run=run, passes_options=True)
+
+    arguments, options = parser.parse_known_args(p_arguments)
+    if getattr(arguments, "passes_options", False):
+        arguments.options = options
+    elif options:
+        parser.error("unrecognized arguments: " + " ".join(options))
+    if getattr(arguments, "rows", 0) is None:
+        arguments.rows = arguments.cols
+    return arguments.run(arguments)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -29,18 +29,30 @@
 #   Methods:
 #       - __init__.......initializes a network with random values
 #       - __init__.......initializes a network with values written in a text file
+#       - __init__.......initializes a network with values written in a binary file
 #       - feed_forward...conducts a series of matrix multiplications and activation
 #                        functions (currently the sigmoid function) to produce an output
 #                        vector
 #       - activate.......applies the sigmoid function to every element in a vector
+#       - activate_in_place...applies the sigmoid function without allocating
 #       - sigmoid........1/(1+e^-x)
 #       - print..........used to write the network to a file
+#       - get_parameters.returns every weight and bias in 1 flat vector
+#       - set_parameters.loads every weight and bias from 1 flat vector
+#
+#   Parameter layout: the flat vector stores W[1], B[1], W[2], B[2], W[3], B[3] in
+#                     that order, each in row major order (see LAYERS below). This
+#                     is the layout used by Cneural_population.
 #
 #########################################################################################
 import numpy as np
 import os
-import math
-import sys
+
+# (name, layer, shape) of each matrix in the flat parameter vector
+LAYERS = [("W", 1, (16, 32)), ("B", 1, (16, 1)),
+          ("W", 2, (16, 16)), ("B", 2, (16, 1)),
+          ("W", 3, (4, 16)),  ("B", 3, (4, 1))]
+NUM_PARAMETERS = sum(shape[0] * shape[1] for name, layer, shape in LAYERS)
 
 class Cneural_net:
 
@@ -49,28 +61,37 @@ class Cneural_net:
     #   Cneural_net:__init__
     #       Parameters: 1. p_directory_path...the path of the file storing the values to 
     #                                         initialize the netork. If it is "new",
-    #                                         then it is randomly initialized.
+    #                                         then it is randomly initialized. If it
+    #                                         ends in ".npy", it is a binary network
+    #                                         file (see checkpoint.py).
+    #                   2. p_rng..............the numpy Generator used for random
+    #                                         initialization. If None, a freshly
+    #                                         seeded generator is used
     # 
     #       Description: Initializes weights and basis matrices
     #
     #####################################################################################
-    def __init__(self, p_directory_path):
+    def __init__(self, p_directory_path, p_rng = None):
         self.W = {}
         self.B = {}
-        if p_directory_path != "new":
+        if p_directory_path.endswith(".npy"):
+            self.set_parameters(np.load(p_directory_path))
+        elif p_directory_path != "new":
             self.W[1] = np.loadtxt(p_directory_path + "/W_1", delimiter=' ')
             self.W[2] = np.loadtxt(p_directory_path + "/W_2", delimiter=' ')
             self.W[3] = np.loadtxt(p_directory_path + "/W_3", delimiter=' ')
-            self.B[1] = np.loadtxt(p_directory_path + "/B_1", delimiter=' ')
-            self.B[2] = np.loadtxt(p_directory_path + "/B_2", delimiter=' ')
-            self.B[3] = np.loadtxt(p_directory_path + "/B_3", delimiter=' ')
+            self.B[1] = np.loadtxt(p_directory_path + "/B_1", delimiter=' ').reshape(16, 1)
+            self.B[2] = np.loadtxt(p_directory_path + "/B_2", delimiter=' ').reshape(16, 1)
+            self.B[3] = np.loadtxt(p_directory_path + "/B_3", delimiter=' ').reshape(4, 1)
         else:
-            self.W[1] = np.random.randn(16, 32).round(decimals=7)
-            self.W[2] = np.random.randn(16, 16).round(decimals=7)
-            self.W[3] = np.random.randn(4, 16).round(decimals=7)
-            self.B[1] = np.random.randn(16, 1).round(decimals=7)
-            self.B[2] = np.random.randn(16, 1).round(decimals=7)
-            self.B[3] = np.random.randn(4, 1).round(decimals=7)  
+            if p_rng is None:
+                p_rng = np.random.default_rng()
+            self.W[1] = p_rng.standard_normal((16, 32)).round(decimals=7)
+            self.W[2] = p_rng.standard_normal((16, 16)).round(decimals=7)
+            self.W[3] = p_rng.standard_normal((4, 16)).round(decimals=7)
+            self.B[1] = p_rng.standard_normal((16, 1)).round(decimals=7)
+            self.B[2] = p_rng.standard_normal((16, 1)).round(decimals=7)
+            self.B[3] = p_rng.standard_normal((4, 1)).round(decimals=7)
                   
 
     #####################################################################################
@@ -78,15 +99,30 @@ class Cneural_net:
     #   Cneural_net:feed_forward
     #       Parameters: 1. p_input_vector...defines the values of the first layer of the
     #                                       network
+    #                   2. p_reuse_buffers..if True, every layer is computed in place in
+    #                                       buffers owned by the network, and the
+    #                                       returned vector is overwritten by the next
+    #                                       call. Used by controllers that call the
+    #                                       network every step
     #
     #       Description: Iterates a series of matrix multiplications and acitvation 
-    #                    functions to produce an output vector. 
+    #                    functions to produce an output vector. p_input_vector has
+    #                    shape (32,1) and the output has shape (4,1)
     #
     #####################################################################################
-    def feed_forward(self, p_input_vector):
-        layer_1 = self.activate(np.matmul(W[1],p_input_vector)+B[1])
-        layer_2 = self.activate(np.matmul(W[2],layer_1)+B[2])
-        output = self.activate(np.matmul(W[3],layer_2)+B[3])
+    def feed_forward(self, p_input_vector, p_reuse_buffers = False):
+        if p_reuse_buffers:
+            if not hasattr(self, "layer_1"):
+                self.layer_1 = np.empty((16, 1))
+                self.layer_2 = np.empty((16, 1))
+                self.output = np.empty((4, 1))
+            self.activate_in_place(np.add(np.matmul(self.W[1],p_input_vector,out=self.layer_1),self.B[1],out=self.layer_1))
+            self.activate_in_place(np.add(np.matmul(self.W[2],self.layer_1,out=self.layer_2),self.B[2],out=self.layer_2))
+            self.activate_in_place(np.add(np.matmul(self.W[3],self.layer_2,out=self.output),self.B[3],out=self.output))
+            return self.output
+        layer_1 = self.activate(np.matmul(self.W[1],p_input_vector)+self.B[1])
+        layer_2 = self.activate(np.matmul(self.W[2],layer_1)+self.B[2])
+        output = self.activate(np.matmul(self.W[3],layer_2)+self.B[3])
         return output
 
     #####################################################################################
@@ -113,28 +149,73 @@ class Cneural_net:
     #
     #####################################################################################
     def sigmoid(self, p_x):
-        return 1/(1+math.e^(-p_x))
+        with np.errstate(over='ignore'):
+            return 1/(1+np.exp(-p_x))
+
+    #####################################################################################
+    #
+    #   Cneural_net:activate_in_place
+    #       Parameters: 1. p_vector...the vector to apply the sigmoid function to
+    #
+    #       Description: same as activate, but overwrites p_vector instead of
+    #                    allocating a new vector
+    #
+    #####################################################################################
+    def activate_in_place(self, p_vector):
+        with np.errstate(over='ignore'):
+            np.negative(p_vector, out=p_vector)
+            np.exp(p_vector, out=p_vector)
+            p_vector += 1
+            np.reciprocal(p_vector, out=p_vector)
 
     #####################################################################################
     #
     #   Cneural_net:print
     #       Parameters: 1. p_directory_path...the directory to store the network data
     #
-    #       Return: prints weights and basis matrices to the text file in file_path
+    #       Return: prints weights and basis matrices to the text file in file_path,
+    #               creating the directory if needed. The text files keep 7 decimals;
+    #               use checkpoint.save_network to keep full precision
     #
     #####################################################################################
     def print(self, p_directory_path):
-        os.mkdir(p_directory_path)
-        origional_output = sys.stdout
-        #sys.stdout = open(p_file_path, "w")
+        os.makedirs(p_directory_path, exist_ok=True)
         for i in self.W:
-            sys.stdout = open(p_directory_path + "/W_" + str(i), "w")
             np.savetxt(p_directory_path + "/W_" + str(i), self.W[i], fmt="%.7f")
-            #print(self.W[i])
         for i in self.B:
-            sys.stdout = open(p_directory_path + "/B_" + str(i), "w")
             np.savetxt(p_directory_path + "/B_" + str(i), self.B[i], fmt="%.7f")
-            #print(self.B[i])
-        sys.stdout = origional_output
-    
-    
\ No newline at end of file
+
+    #####################################################################################
+    #
+    #   Cneural_net:get_parameters
+    #       Return: a vector of length NUM_PARAMETERS storing every weight and bias
+    #
+    #####################################################################################
+    def get_parameters(self):
+        matrices = []
+        for name, layer, shape in LAYERS:
+            if name == "W":
+                matrices.append(self.W[layer].ravel())
+            else:
+                matrices.append(self.B[layer].ravel())
+        return np.concatenate(matrices)
+
+    #####################################################################################
+    #
+    #   Cneural_net:set_parameters
+    #       Parameters: 1. p_parameters...a vector of length NUM_PARAMETERS in the layout
+    #                                     returned by get_parameters
+    #
+    #####################################################################################
+    def set_parameters(self, p_parameters):
+        p_parameters = np.asarray(p_parameters, dtype=float)
+        if p_parameters.shape != (NUM_PARAMETERS,):
+            raise ValueError("expected " + str(NUM_PARAMETERS) + " parameters, got shape " + str(p_parameters.shape))
+        start = 0
+        for name, layer, shape in LAYERS:
+            end = start + shape[0] * shape[1]
+            if name == "W":
+                self.W[layer] = p_parameters[start:end].reshape(shape).copy()
+            else:
+                self.B[layer] = p_parameters[start:end].reshape(shape).copy()
+            start = end
@@ -0,0 +1,130 @@
+#########################################################################################
+#
+#                                   Neural Population
+#
+#   Purpose: Runs many Cneural_net networks at once. The weights of P networks are
+#            stacked into (P,16,32), (P,16,16) and (P,4,16) tensors so that 1 batched
+#            matrix multiplication per layer evaluates every network on its own input.
+#
+#   Storage: every network is 1 row of a (P, NUM_PARAMETERS) matrix in the layout of
+#            Cneural_net.get_parameters. W and B are views into that matrix, so a
+#            population built on a shared or memory mapped array is never copied.
+#
+#   Class attributes:
+#       1. parameters...the (P, NUM_PARAMETERS) matrix of every weight and bias
+#       2. size.........P, the number of networks
+#       3. W............a dictionary of the stacked weight tensors
+#       4. B............a dictionary of the stacked bias tensors, shape (P,n,1)
+#       5. layer_1......output buffer of the first hidden layer, shape (P,16,1)
+#       6. layer_2......output buffer of the second hidden layer, shape (P,16,1)
+#       7. output.......output buffer of the output layer, shape (P,4,1)
+#
+#   Methods:
+#       - __init__.......builds the views and output buffers
+#       - feed_forward...evaluates every network on its row of a (P,32) input
+#       - get_network....copies 1 network out of the population
+#       - activate.......applies the sigmoid function in place
+#
+#   Functions:
+#       - stack_networks...builds a population from a list of Cneural_net objects
+#
+#########################################################################################
+import numpy as np
+from neural_net import Cneural_net, LAYERS, NUM_PARAMETERS
+
+class Cneural_population:
+
+    #####################################################################################
+    #
+    #   Cneural_population:__init__
+    #       Parameters: 1. p_parameters...a (P, NUM_PARAMETERS) matrix, 1 network per row
+    #                   2. p_dtype........the precision used for inference, for example
+    #                                     np.float32. If None, the precision of
+    #                                     p_parameters is used and it is not copied
+    #
+    #####################################################################################
+    def __init__(self, p_parameters, p_dtype = None):
+        parameters = np.asarray(p_parameters)
+        if p_dtype is not None:
+            parameters = parameters.astype(p_dtype, copy=False)
+        if parameters.ndim != 2 or parameters.shape[1] != NUM_PARAMETERS:
+            raise ValueError("expected a (P, " + str(NUM_PARAMETERS) + ") matrix, got shape " + str(parameters.shape))
+        self.parameters = parameters
+        self.size = parameters.shape[0]
+        self.W = {}
+        self.B = {}
+        start = 0
+        for name, layer, shape in LAYERS:
+            end = start + shape[0] * shape[1]
+            view = parameters[:, start:end].reshape(self.size, shape[0], shape[1])
+            if name == "W":
+                self.W[layer] = view
+            else:
+                self.B[layer] = view
+            start = end
+        self.layer_1 = np.empty((self.size, 16, 1), dtype=parameters.dtype)
+        self.layer_2 = np.empty((self.size, 16, 1), dtype=parameters.dtype)
+        self.output = np.empty((self.size, 4, 1), dtype=parameters.dtype)
+
+    #####################################################################################
+    #
+    #   Cneural_population:feed_forward
+    #       Parameters: 1. p_inputs...a (P,32) matrix, row i is the input of network i
+    #
+    #       Return: a (P,4) view of the output buffer. It is overwritten by the next
+    #               call, so copy it if it needs to be kept
+    #
+    #####################################################################################
+    def feed_forward(self, p_inputs):
+        inputs = np.asarray(p_inputs).reshape(self.size, 32, 1)
+        np.matmul(self.W[1], inputs, out=self.layer_1)
+        self.layer_1 += self.B[1]
+        self.activate(self.layer_1)
+        np.matmul(self.W[2], self.layer_1, out=self.layer_2)
+        self.layer_2 += self.B[2]
+        self.activate(self.layer_2)
+        np.matmul(self.W[3], self.layer_2, out=self.output)
+        self.output += self.B[3]
+        self.activate(self.output)
+        return self.output[:, :, 0]
+
+    #####################################################################################
+    #
+    #   Cneural_population:activate
+    #       Parameters: 1. p_buffer...array to apply 1/(1+e^-x) to, in place
+    #
+    #####################################################################################
+    def activate(self, p_buffer):
+        with np.errstate(over='ignore'):
+            np.negative(p_buffer, out=p_buffer)
+            np.exp(p_buffer, out=p_buffer)
+            p_buffer += 1
+            np.reciprocal(p_buffer, out=p_buffer)
+
+    #####################################################################################
+    #
+    #   Cneural_population:get_network
+    #       Parameters: 1. p_index...the row of the network
+    #
+    #       Return: a Cneural_net with a copy of the network's weights
+    #
+    #####################################################################################
+    def get_network(self, p_index):
+        network = Cneural_net("new")
+        network.set_parameters(self.parameters[p_index])
+        return network
+
+#########################################################################################
+#
+#   stack_networks
+#       Parameters: 1. p_networks...a list of Cneural_net objects
+#                   2. p_dtype......the precision used for inference
+#
+#       Return: a Cneural_population holding a copy of every network
+#
+#########################################################################################
+def stack_networks(p_networks, p_dtype = np.float64):
+    parameters = np.empty((len(p_networks), NUM_PARAMETERS), dtype=p_dtype)
+    for i in range(len(p_networks)):
+        parameters[i] = p_networks[i].get_parameters()
+    return Cneural_population(parameters)
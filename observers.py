@@ -0,0 +1,290 @@
+#########################################################################################
+#
+#                                     Game Observers
+#
+#   Purpose: Everything Cgame.play_game does besides applying the game rules (drawing
+#            the board, limiting the frame rate, and writing the game to stdout) is
+#            done by an observer. A game played with no observers runs headless at
+#            full speed.
+#
+#   Observer interface: every observer implements the 3 methods below. Each receives
+#                       the Cgame object and the snake object being played.
+#       - start...called once after the first snack is placed
+#       - update..called once after every step where the snake is still alive
+#       - end.....called once after the game is over
+#
+#   Profiling: if the game has a profiler (see profiler.py), drawing, display updates,
+#              waiting and printing are timed as its render, flush, tick and log
+#              phases.
+#
+#   Imports: pygame is imported by the methods that use it, so Clog_observer can be
+#            used without it.
+#
+#   Classes:
+#       - Crender_observer...draws the game in a pygame window
+#       - Cdirty_render_observer...draws the game in a pygame window, repainting only
+#                                  the cells that changed each step
+#       - Ctick_observer.....limits the game to a fixed number of steps per second
+#       - Clog_observer......prints the snake and snack locations every step
+#
+#########################################################################################
+
+class Crender_observer:
+
+    #####################################################################################
+    #
+    #   Crender_observer:start
+    #       Description: opens the game window and draws the first frame
+    #
+    #####################################################################################
+    def start(self, p_game, p_snake):
+        import pygame
+        p_game.display = pygame.display.set_mode((p_game.width, p_game.height))
+        pygame.display.set_caption('Snake Game')
+        self.draw(p_game, p_snake)
+
+    #####################################################################################
+    #
+    #   Crender_observer:update
+    #       Description: redraws the entire board
+    #
+    #####################################################################################
+    def update(self, p_game, p_snake):
+        self.draw(p_game, p_snake)
+
+    #####################################################################################
+    #
+    #   Crender_observer:end
+    #       Description: shows the final frame
+    #
+    #####################################################################################
+    def end(self, p_game, p_snake):
+        import pygame
+        pygame.display.update()
+
+    #####################################################################################
+    #
+    #   Crender_observer:draw
+    #       Description: clears the screen, then draws the grid, snack and snake
+    #
+    #####################################################################################
+    def draw(self, p_game, p_snake):
+        import pygame
+        profiler = p_game.profiler
+        if profiler is not None:
+            start = profiler.begin()
+        black = (0,0,0)
+        p_game.display.fill(black)
+        p_game.print_grid()
+        p_game.print_snack(p_snake)
+        p_game.print_snake(p_snake)
+        if profiler is not None:
+            start = profiler.end("render", start)
+        pygame.display.update()
+        if profiler is not None:
+            profiler.end("flush", start)
+
+class Cdirty_render_observer:
+
+    #####################################################################################
+    #
+    #   Cdirty_render_observer:start
+    #       Description: opens the game window, draws the grid once on a background
+    #                    surface, and draws the first frame over it
+    #
+    #####################################################################################
+    def start(self, p_game, p_snake):
+        import pygame
+        self.window = pygame.display.set_mode((p_game.width, p_game.height))
+        pygame.display.set_caption('Snake Game')
+        self.background = pygame.Surface(self.window.get_size())
+        self.background.fill((0,0,0))
+        p_game.display = self.background
+        p_game.print_grid()
+        p_game.display = self.window
+        self.window.blit(self.background, (0, 0))
+        p_game.print_snack(p_snake)
+        for chunk in p_snake.get_position():
+            p_game.print_chunk(chunk)
+        pygame.display.update()
+        self.remember(p_game, p_snake)
+
+    #####################################################################################
+    #
+    #   Cdirty_render_observer:update
+    #       Description: every other chunk of the snake is already on the screen, so
+    #                    only the vacated tail, the old and new snack and the new head
+    #                    are repainted, and only their rectangles are sent to the
+    #                    display. The cost of a frame does not depend on the size of
+    #                    the board or the length of the snake. (The red vision lines of
+    #                    Crender_observer are not drawn.)
+    #
+    #####################################################################################
+    def update(self, p_game, p_snake):
+        import pygame
+        profiler = p_game.profiler
+        if profiler is not None:
+            start = profiler.begin()
+        dirty = []
+        if p_snake.get_size() == self.size:
+            dirty.append(self.erase(p_game, self.tail))
+        if p_game.snack != self.snack:
+            dirty.append(self.erase(p_game, self.snack))
+            p_game.print_snack(p_snake)
+            dirty.append(self.cell(p_game, p_game.snack))
+        head = p_snake.get_position()[0]
+        p_game.print_chunk(head)
+        dirty.append(self.cell(p_game, head))
+        if profiler is not None:
+            start = profiler.end("render", start)
+        pygame.display.update(dirty)
+        if profiler is not None:
+            profiler.end("flush", start)
+        self.remember(p_game, p_snake)
+
+    #####################################################################################
+    #
+    #   Cdirty_render_observer:end
+    #       Description: does nothing, the last step was already sent to the display
+    #
+    #####################################################################################
+    def end(self, p_game, p_snake):
+        pass
+
+    #####################################################################################
+    #
+    #   Cdirty_render_observer:remember
+    #       Description: stores what is needed to find the changed cells next step
+    #
+    #####################################################################################
+    def remember(self, p_game, p_snake):
+        self.tail = p_snake.get_position()[-1]
+        self.snack = p_game.snack
+        self.size = p_snake.get_size()
+
+    #####################################################################################
+    #
+    #   Cdirty_render_observer:cell
+    #       Return: the pygame.Rect of the block at the (x,y) cell p_location
+    #
+    #####################################################################################
+    def cell(self, p_game, p_location):
+        import pygame
+        block = p_game.block_size
+        return pygame.Rect(p_location[0] * block, p_location[1] * block, block, block)
+
+    #####################################################################################
+    #
+    #   Cdirty_render_observer:erase
+    #       Description: copies the background over the block at p_location
+    #
+    #       Return: the rectangle that was erased
+    #
+    #####################################################################################
+    def erase(self, p_game, p_location):
+        rect = self.cell(p_game, p_location)
+        self.window.blit(self.background, rect, rect)
+        return rect
+
+class Ctick_observer:
+
+    #####################################################################################
+    #
+    #   Ctick_observer:__init__
+    #       Parameters: 1. p_steps_per_second...the maximum speed of the game
+    #
+    #####################################################################################
+    def __init__(self, p_steps_per_second = 10):
+        self.steps_per_second = p_steps_per_second
+
+    #####################################################################################
+    #
+    #   Ctick_observer:start
+    #       Description: creates the clock that paces the game
+    #
+    #####################################################################################
+    def start(self, p_game, p_snake):
+        import pygame
+        self.clock = pygame.time.Clock()
+
+    #####################################################################################
+    #
+    #   Ctick_observer:update
+    #       Description: waits until the next step is due
+    #
+    #####################################################################################
+    def update(self, p_game, p_snake):
+        self.tick(p_game)
+
+    #####################################################################################
+    #
+    #   Ctick_observer:end
+    #       Description: holds the final frame for 1 step
+    #
+    #####################################################################################
+    def end(self, p_game, p_snake):
+        self.tick(p_game)
+
+    #####################################################################################
+    #
+    #   Ctick_observer:tick
+    #       Parameters: 1. p_game...the Cgame being played
+    #
+    #       Description: sleeps until 1/steps_per_second has passed since the last
+    #                    tick, timed as the tick phase of the game's profiler if it has 1
+    #
+    #####################################################################################
+    def tick(self, p_game):
+        profiler = p_game.profiler
+        if profiler is None:
+            self.clock.tick(self.steps_per_second)
+        else:
+            start = profiler.begin()
+            self.clock.tick(self.steps_per_second)
+            profiler.end("tick", start)
+
+class Clog_observer:
+
+    #####################################################################################
+    #
+    #   Clog_observer:start
+    #       Description: records the starting size so that growth can be reported
+    #
+    #####################################################################################
+    def start(self, p_game, p_snake):
+        self.size = p_snake.get_size()
+        self.update(p_game, p_snake)
+
+    #####################################################################################
+    #
+    #   Clog_observer:update
+    #       Description: prints the snack location ("none" once the snake fills the
+    #                    board), the snake size and the location of each snake chunk
+    #
+    #####################################################################################
+    def update(self, p_game, p_snake):
+        profiler = p_game.profiler
+        if profiler is not None:
+            start = profiler.begin()
+        if p_snake.get_size() > self.size:
+            print("No pop!")
+        self.size = p_snake.get_size()
+        if p_game.snack is None:
+            print("snack: none ", end = "")
+        else:
+            print("snack: ("+str(p_game.snack[0])+","+str(p_game.snack[1])+") ", end = "")
+        print(p_snake.get_size(), end = ": ")
+        for chunk in p_snake.get_position():
+            print("("+str(chunk[0])+","+str(chunk[1])+") ", end = "")
+        print("")
+        if profiler is not None:
+            profiler.end("log", start)
+
+    #####################################################################################
+    #
+    #   Clog_observer:end
+    #       Description: prints that the game is over
+    #
+    #####################################################################################
+    def end(self, p_game, p_snake):
+        print("Game Over")
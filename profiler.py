@@ -0,0 +1,197 @@
+#########################################################################################
+#
+#                                       Profiler
+#
+#   Purpose: Shows where the time of a game goes. A Cprofiler attached to a Cgame
+#            (game.profiler = Cprofiler()) times each phase of every step, counts
+#            game events and calls hooks when they happen. Cgame.profiler is None by
+#            default, and then the game and observers only pay for 1 attribute check
+#            per step.
+#
+#   Phases: time spent in each phase is summed in nanoseconds.
+#       - controller...the snake deciding which way to turn (Csnake.steer)
+#       - physics......moving the snake and checking for collisions
+#       - snack........placing a new snack after one is eaten
+#       - render.......drawing the board (render observers)
+#       - flush........sending the drawing to the display (render observers)
+#       - tick.........waiting for the next frame (Ctick_observer)
+#       - log..........printing the game (Clog_observer)
+#
+#   Counters:
+#       - steps...........steps played
+#       - snacks..........snacks eaten
+#       - snack_rerolls...snack locations rejected by Cgame.set_snack because they
+#                         were inside the snake
+#
+#   Hooks: callbacks called as callback(game, snake) on an event:
+#       - start.....after the first snack is placed
+#       - step......after every step where the snake is still alive
+#       - snack.....after a snack is eaten and a new one is placed
+#       - death.....after the snake leaves the board or runs into itself
+#       - end.......after the game is over
+#
+#   Output: summary returns the totals as a dictionary, save_json writes it, and
+#           save_chrome_trace writes every timed phase in the Chrome trace event
+#           format (open it in chrome://tracing or ui.perfetto.dev). Phases are only
+#           recorded for the trace if the profiler is created with p_trace = True.
+#
+#   Classes:
+#       - Cprofiler...per-phase timers, counters and hooks
+#
+#########################################################################################
+import json
+import os
+import time
+
+class Cprofiler:
+
+    #####################################################################################
+    #
+    #   Cprofiler:__init__
+    #       Parameters: 1. p_trace.......if True, every timed phase is also recorded for
+    #                                    save_chrome_trace
+    #                   2. p_max_events...the most phases recorded for the trace; later
+    #                                    phases are still timed and counted
+    #
+    #####################################################################################
+    def __init__(self, p_trace = False, p_max_events = 1000000):
+        self.trace = p_trace
+        self.max_events = p_max_events
+        self.events = []
+        self.phase_time = {}
+        self.phase_calls = {}
+        self.counters = {}
+        self.hooks = {}
+        self.origin = time.perf_counter_ns()
+
+    #####################################################################################
+    #
+    #   Cprofiler:begin
+    #       Return: the current time, to pass to end
+    #
+    #####################################################################################
+    def begin(self):
+        return time.perf_counter_ns()
+
+    #####################################################################################
+    #
+    #   Cprofiler:end
+    #       Parameters: 1. p_phase...the name of the phase that is ending
+    #                   2. p_start...the time returned by begin (or by the previous end)
+    #
+    #       Return: the current time, so consecutive phases can be timed by passing the
+    #               result of end straight into the next end
+    #
+    #####################################################################################
+    def end(self, p_phase, p_start):
+        now = time.perf_counter_ns()
+        if p_phase in self.phase_time:
+            self.phase_time[p_phase] = self.phase_time[p_phase] + now - p_start
+            self.phase_calls[p_phase] = self.phase_calls[p_phase] + 1
+        else:
+            self.phase_time[p_phase] = now - p_start
+            self.phase_calls[p_phase] = 1
+        if self.trace and len(self.events) < self.max_events:
+            self.events.append((p_phase, p_start, now))
+        return now
+
+    #####################################################################################
+    #
+    #   Cprofiler:count
+    #       Parameters: 1. p_counter...the name of the counter
+    #                   2. p_amount....the amount to add
+    #
+    #####################################################################################
+    def count(self, p_counter, p_amount = 1):
+        self.counters[p_counter] = self.counters.get(p_counter, 0) + p_amount
+
+    #####################################################################################
+    #
+    #   Cprofiler:add_hook
+    #       Parameters: 1. p_event......one of the events listed above
+    #                   2. p_callback...called as p_callback(game, snake) on p_event
+    #
+    #####################################################################################
+    def add_hook(self, p_event, p_callback):
+        self.hooks.setdefault(p_event, []).append(p_callback)
+
+    #####################################################################################
+    #
+    #   Cprofiler:emit
+    #       Parameters: 1. p_event...the event that happened
+    #                   2. p_game....the Cgame
+    #                   3. p_snake...the snake being played
+    #
+    #####################################################################################
+    def emit(self, p_event, p_game, p_snake):
+        for callback in self.hooks.get(p_event, ()):
+            callback(p_game, p_snake)
+
+    #####################################################################################
+    #
+    #   Cprofiler:reset
+    #       Description: clears every timer, counter and trace event; hooks are kept
+    #
+    #####################################################################################
+    def reset(self):
+        self.events = []
+        self.phase_time = {}
+        self.phase_calls = {}
+        self.counters = {}
+        self.origin = time.perf_counter_ns()
+
+    #####################################################################################
+    #
+    #   Cprofiler:summary
+    #       Return: {"phases": {name: {"calls", "total_ms", "mean_us", "share"}},
+    #                "counters": {name: value}}, where share is the fraction of all
+    #               timed time spent in the phase
+    #
+    #####################################################################################
+    def summary(self):
+        total = sum(self.phase_time.values())
+        phases = {}
+        for phase in sorted(self.phase_time, key=self.phase_time.get, reverse=True):
+            elapsed = self.phase_time[phase]
+            calls = self.phase_calls[phase]
+            phases[phase] = {
+                "calls": calls,
+                "total_ms": elapsed / 1e6,
+                "mean_us": elapsed / calls / 1e3,
+                "share": elapsed / total if total else 0.0,
+            }
+        return {"phases": phases, "counters": dict(self.counters)}
+
+    #####################################################################################
+    #
+    #   Cprofiler:save_json
+    #       Parameters: 1. p_path...the destination file for summary
+    #
+    #####################################################################################
+    def save_json(self, p_path):
+        with open(p_path, "w") as output_file:
+            json.dump(self.summary(), output_file, indent=2)
+
+    #####################################################################################
+    #
+    #   Cprofiler:save_chrome_trace
+    #       Parameters: 1. p_path...the destination .json file
+    #
+    #       Description: writes each recorded phase as a complete ("X") event and the
+    #                    final counters as counter ("C") events, in microseconds since
+    #                    the profiler was created or reset
+    #
+    #####################################################################################
+    def save_chrome_trace(self, p_path):
+        pid = os.getpid()
+        trace = []
+        last = self.origin
+        for phase, start, end in self.events:
+            trace.append({"name": phase, "ph": "X", "pid": pid, "tid": 0,
+                          "ts": (start - self.origin) / 1e3, "dur": (end - start) / 1e3})
+            last = end
+        for counter, value in self.counters.items():
+            trace.append({"name": counter, "ph": "C", "pid": pid, "tid": 0,
+                          "ts": (last - self.origin) / 1e3, "args": {counter: value}})
+        with open(p_path, "w") as output_file:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, output_file)
@@ -0,0 +1,322 @@
+#########################################################################################
+#
+#                                    Q-Learning Agent
+#
+#   Purpose: A cheap reference controller to compare evolved networks against. The
+#            snake sees only a small state, every state is an integer key into a
+#            table of action values, and training plays thousands of headless games
+#            at once in a Cbatch_env.
+#
+#   State: key = (danger * 9 + food) * 5 + heading, NUM_STATES keys in all
+#       - danger....4 bits, set if the cell left (1), right (2), up (4) or down (8) of
+#                   the head is a wall or a snake chunk
+#       - food......3 * (x direction to the snack + 1) + (y direction + 1), where a
+#                   direction is -1, 0 or 1
+#       - heading...the direction the snake is moving (0-3, see Csnake.turn), or 4 if
+#                   it has not moved yet
+#
+#   Training: each step every game picks an epsilon-greedy action, and the
+#             transitions (key, action, reward, next key, done) of all games are
+#             written to a preallocated ring buffer. The table is then updated from
+#             the new transitions and from a random batch of old ones, with 1
+#             vectorized update per batch: the corrections of repeated (state,
+#             action) pairs are averaged with np.bincount, so the step does not grow
+#             with the number of games. Eating is rewarded with 1 and dying with -1.
+#             Games that die, fill the board, or go p_hunger steps without eating
+#             are restarted in place.
+#
+#   Classes:
+#       - Cexperience_buffer...ring buffer of transitions
+#       - Cq_table.............the table of action values and the learning rule
+#       - Csnake_q.............a snake that plays the best action in a Cq_table
+#
+#   Functions:
+#       - state_key.....the key of a Csnake's board
+#       - state_keys....the key of every game in a Cbatch_env
+#       - train_q.......trains a Cq_table in a Cbatch_env
+#
+#########################################################################################
+import numpy as np
+from batch_env import Cbatch_env, FULL, X_DELTA, Y_DELTA
+from snake import Csnake, DIRECTIONS
+from vision import DIRECTION_INDEX, direction_index
+
+NUM_STATES = 16 * 9 * 5
+NUM_ACTIONS = 4
+
+#########################################################################################
+#
+#   state_key
+#       Parameters: 1. p_board...the snake's Cboard_state
+#                   2. p_snack...the (x,y) cell of the snack
+#                   3. p_x_delta, p_y_delta...the direction the snake is moving
+#
+#       Return: the key of the state, as described above
+#
+#########################################################################################
+def state_key(p_board, p_snack, p_x_delta, p_y_delta):
+    x, y = p_board.body[0]
+    cols = p_board.cols
+    rows = p_board.rows
+    count = p_board.count
+    danger = 0
+    for direction in range(4):
+        next_x = x + DIRECTIONS[direction][0]
+        next_y = y + DIRECTIONS[direction][1]
+        if next_x < 0 or next_y < 0 or next_x >= cols or next_y >= rows or count[next_y * cols + next_x]:
+            danger = danger | (1 << direction)
+    food = 3 * ((p_snack[0] > x) - (p_snack[0] < x) + 1) + (p_snack[1] > y) - (p_snack[1] < y) + 1
+    heading = direction_index(p_x_delta, p_y_delta)
+    if heading < 0:
+        heading = 4
+    return (danger * 9 + food) * 5 + heading
+
+#########################################################################################
+#
+#   state_keys
+#       Parameters: 1. p_env...a Cbatch_env
+#
+#       Return: the key of every game in p_env (games that are over get a key too,
+#               but it is meaningless)
+#
+#########################################################################################
+def state_keys(p_env):
+    head = p_env.body[p_env.games, p_env.head_ptr]
+    x = head % p_env.cols
+    y = head // p_env.cols
+    danger = np.zeros(p_env.num_games, dtype=np.int64)
+    for direction in range(4):
+        next_x = x + X_DELTA[direction]
+        next_y = y + Y_DELTA[direction]
+        wall = (next_x < 0) | (next_y < 0) | (next_x >= p_env.cols) | (next_y >= p_env.rows)
+        cell = np.where(wall, 0, next_y * p_env.cols + next_x)
+        blocked = wall | (p_env.occupancy[p_env.games, cell] != 0)
+        danger |= blocked.astype(np.int64) << direction
+    snack_x = p_env.snack % p_env.cols
+    snack_y = p_env.snack // p_env.cols
+    food = 3 * (np.sign(snack_x - x) + 1) + np.sign(snack_y - y) + 1
+    heading = DIRECTION_INDEX[(p_env.x_delta + 1) + 3 * (p_env.y_delta + 1)]
+    heading = np.where(heading < 0, 4, heading)
+    return (danger * 9 + food) * 5 + heading
+
+class Cexperience_buffer:
+
+    #####################################################################################
+    #
+    #   Cexperience_buffer:__init__
+    #       Parameters: 1. p_capacity...the most transitions stored; once full, the
+    #                                   oldest are overwritten
+    #
+    #####################################################################################
+    def __init__(self, p_capacity):
+        self.capacity = p_capacity
+        self.states = np.zeros(p_capacity, dtype=np.int32)
+        self.actions = np.zeros(p_capacity, dtype=np.int8)
+        self.rewards = np.zeros(p_capacity, dtype=np.float32)
+        self.next_states = np.zeros(p_capacity, dtype=np.int32)
+        self.done = np.zeros(p_capacity, dtype=bool)
+        self.position = 0
+        self.size = 0
+
+    #####################################################################################
+    #
+    #   Cexperience_buffer:add
+    #       Parameters: 1. p_states, p_actions, p_rewards, p_next_states, p_done...
+    #                   arrays with 1 entry per transition
+    #
+    #####################################################################################
+    def add(self, p_states, p_actions, p_rewards, p_next_states, p_done):
+        count = len(p_states)
+        if count > self.capacity:
+            return self.add(p_states[-self.capacity:], p_actions[-self.capacity:], p_rewards[-self.capacity:], p_next_states[-self.capacity:], p_done[-self.capacity:])
+        index = (self.position + np.arange(count)) % self.capacity
+        self.states[index] = p_states
+        self.actions[index] = p_actions
+        self.rewards[index] = p_rewards
+        self.next_states[index] = p_next_states
+        self.done[index] = p_done
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+
+    #####################################################################################
+    #
+    #   Cexperience_buffer:sample
+    #       Parameters: 1. p_count...the number of transitions
+    #                   2. p_rng.....a numpy Generator
+    #
+    #       Return: (states, actions, rewards, next states, done) of p_count random
+    #               stored transitions
+    #
+    #####################################################################################
+    def sample(self, p_count, p_rng):
+        index = p_rng.integers(0, self.size, p_count)
+        return self.states[index], self.actions[index], self.rewards[index], self.next_states[index], self.done[index]
+
+class Cq_table:
+
+    #####################################################################################
+    #
+    #   Cq_table:__init__
+    #       Parameters: 1. p_learning_rate...fraction of each error applied per update
+    #                   2. p_discount........weight of future rewards
+    #                   3. p_values..........an existing (NUM_STATES, 4) table, or None
+    #                                        to start from 0
+    #
+    #####################################################################################
+    def __init__(self, p_learning_rate = 0.1, p_discount = 0.95, p_values = None):
+        self.learning_rate = p_learning_rate
+        self.discount = p_discount
+        if p_values is None:
+            p_values = np.zeros((NUM_STATES, NUM_ACTIONS))
+        self.values = np.array(p_values, dtype=np.float64)
+
+    #####################################################################################
+    #
+    #   Cq_table:best_actions
+    #       Parameters: 1. p_states...an array of state keys
+    #
+    #       Return: the action with the highest value in each state
+    #
+    #####################################################################################
+    def best_actions(self, p_states):
+        return self.values[p_states].argmax(axis=1)
+
+    #####################################################################################
+    #
+    #   Cq_table:update
+    #       Parameters: 1. p_states, p_actions, p_rewards, p_next_states, p_done...
+    #                   arrays with 1 entry per transition
+    #
+    #       Description: moves each value toward reward + discount * the best value of
+    #                    the next state (0 after the last step of a game). The
+    #                    corrections of repeated (state, action) pairs in 1 batch are
+    #                    averaged, so the step does not grow with the batch size
+    #
+    #####################################################################################
+    def update(self, p_states, p_actions, p_rewards, p_next_states, p_done):
+        future = self.values[p_next_states].max(axis=1)
+        future[p_done] = 0
+        error = p_rewards + self.discount * future - self.values[p_states, p_actions]
+        pairs = p_states * NUM_ACTIONS + p_actions
+        total = np.bincount(pairs, weights=error, minlength=self.values.size)
+        count = np.bincount(pairs, minlength=self.values.size)
+        seen = count > 0
+        self.values.reshape(-1)[seen] += self.learning_rate * total[seen] / count[seen]
+
+    #####################################################################################
+    #
+    #   Cq_table:save
+    #       Parameters: 1. p_path...the destination .npy file
+    #
+    #####################################################################################
+    def save(self, p_path):
+        from checkpoint import save_array
+        save_array(self.values, p_path)
+
+    #####################################################################################
+    #
+    #   Cq_table:load
+    #       Parameters: 1. p_path...a file written by save
+    #
+    #       Return: a Cq_table with the saved values
+    #
+    #####################################################################################
+    @staticmethod
+    def load(p_path):
+        values = np.load(p_path)
+        if values.shape != (NUM_STATES, NUM_ACTIONS):
+            raise ValueError("expected a (" + str(NUM_STATES) + ", " + str(NUM_ACTIONS) + ") table, got shape " + str(values.shape))
+        return Cq_table(p_values=values)
+
+class Csnake_q(Csnake):
+
+    #####################################################################################
+    #
+    #   Csnake_q:__init__
+    #       Parameters: 1. p_cols....the width of the board in cells
+    #                   2. p_rows....the height of the board in cells
+    #                   3. p_table...the Cq_table choosing the moves
+    #
+    #####################################################################################
+    def __init__(self, p_cols, p_rows, p_table):
+        Csnake.__init__(self, p_cols, p_rows)
+        self.table = p_table
+
+    #####################################################################################
+    #
+    #   Csnake_q:steer
+    #       Description: turns toward the action with the highest value
+    #
+    #####################################################################################
+    def steer(self, snack_location):
+        values = self.table.values[state_key(self.board, snack_location, self.x_delta, self.y_delta)]
+        self.turn(int(values.argmax()))
+
+#########################################################################################
+#
+#   train_q
+#       Parameters: 1. p_steps.........the number of game steps to play in total
+#                   2. p_table.........the Cq_table to train, or None for a new one
+#                   3. p_num_games.....games played at once
+#                   4. p_cols..........the width and height of the board in cells
+#                   5. p_epsilon.......(start, end) chance of a random action, lowered
+#                                      linearly over training
+#                   6. p_hunger........the most steps a snake may go without eating
+#                   7. p_capacity......transitions kept in the experience buffer
+#                   8. p_replay........old transitions replayed per step
+#                   9. p_seed..........seeds the games and the exploration
+#
+#       Return: (the trained Cq_table, a list of the final size of every game that
+#               ended)
+#
+#########################################################################################
+def train_q(p_steps, p_table = None, p_num_games = 256, p_cols = 12, p_epsilon = (1.0, 0.02), p_hunger = 200, p_capacity = 100000, p_replay = 256, p_seed = None):
+    if p_table is None:
+        p_table = Cq_table()
+    rng = np.random.default_rng(p_seed)
+    env = Cbatch_env(p_num_games, p_cols, p_seed=rng.integers(2**63))
+    buffer = Cexperience_buffer(p_capacity)
+    hunger = np.zeros(p_num_games, dtype=np.int64)
+    sizes = []
+    iterations = max(1, p_steps // p_num_games)
+    keys = state_keys(env)
+    for iteration in range(iterations):
+        epsilon = p_epsilon[0] + (p_epsilon[1] - p_epsilon[0]) * iteration / iterations
+        actions = p_table.best_actions(keys)
+        explore = rng.random(p_num_games) < epsilon
+        actions[explore] = rng.integers(0, NUM_ACTIONS, int(explore.sum()))
+
+        eaten = env.step(actions)
+        next_keys = state_keys(env)
+        done = ~env.alive
+        rewards = eaten.astype(np.float64)
+        rewards[done & (env.cause != FULL)] = -1.0
+
+        buffer.add(keys, actions, rewards, next_keys, done)
+        p_table.update(keys, actions, rewards, next_keys, done)
+        if p_replay > 0:
+            p_table.update(*buffer.sample(p_replay, rng))
+
+        hunger += 1
+        hunger[eaten] = 0
+        finished = env.games[done | (hunger >= p_hunger)]
+        if len(finished) > 0:
+            sizes.extend(env.length[finished].tolist())
+            env.reset_games(finished)
+            hunger[finished] = 0
+            next_keys[finished] = state_keys(env)[finished]
+        keys = next_keys
+    return p_table, sizes
+
+if __name__ == "__main__":
+    import time
+    from game import Cgame
+    start = time.perf_counter()
+    table, sizes = train_q(2000000, p_seed=0)
+    elapsed = time.perf_counter() - start
+    print("trained 2000000 steps in " + format(elapsed, ".1f") + " s (" + format(2000000 / elapsed * 60 / 1e6, ".1f") + " million steps per minute)")
+    print("mean size of the last 1000 training games: " + format(np.mean(sizes[-1000:]), ".2f"))
+    game = Cgame(12, 12, p_seed=0)
+    scores = [game.play_game(Csnake_q(12, 12, table), [], 2000) for i in range(100)]
+    print("greedy play on a 12x12 board: mean size " + format(np.mean(scores), ".2f") + ", best " + str(max(scores)))
+    table.save("q_table.npy")
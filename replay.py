@@ -0,0 +1,199 @@
+#########################################################################################
+#
+#                                        Replays
+#
+#   Purpose: Records games as a seed and a list of moves, so that any game can be
+#            played again exactly, headless or in a pygame window, without storing a
+#            single frame.
+#
+#   File format (all integers little endian):
+#       - 4 bytes.....the characters "SNKR"
+#       - 1 byte......format version (2)
+#       - 8 bytes.....the game seed (Cgame.game_seed)
+#       - 4 bytes.....board width in cells
+#       - 4 bytes.....board height in cells
+#       - 4 bytes.....block size in pixels, used when the replay is drawn
+#       - 4 bytes.....the number of steps
+#       - the rest....the zlib compressed moves, 1 byte per step: 0: left, 1: right,
+#                     2: up, 3: down, 255: not moving yet
+#
+#   Version 1 files stored the board size in pixels instead of the width and height in
+#   cells (board size / block size on a square board). They are still read.
+#
+#   Classes:
+#       - Creplay...........a recorded game
+#       - Creplay_recorder..an observer (see observers.py) that records a game
+#       - Creplay_snake.....a snake that plays the moves of a Creplay
+#
+#   Functions:
+#       - save_replay...writes a replay file
+#       - load_replay...reads a replay file
+#       - play_replay...plays a replay again through Cgame
+#
+#########################################################################################
+import struct
+import zlib
+from checkpoint import write_atomically
+from game import Cgame
+from snake import Csnake
+
+HEADER = struct.Struct("<4sBQIIII")
+HEADER_V1 = struct.Struct("<4sBQIII")
+MAGIC = b"SNKR"
+VERSION = 2
+NOT_MOVING = 255
+
+class Creplay:
+
+    #####################################################################################
+    #
+    #   Creplay:__init__
+    #       Parameters: 1. p_seed.........the seed of the game
+    #                   2. p_cols.........board width in cells
+    #                   3. p_rows.........board height in cells
+    #                   4. p_block_size...block size in pixels
+    #                   5. p_moves........a bytearray with 1 move per step
+    #
+    #####################################################################################
+    def __init__(self, p_seed, p_cols, p_rows, p_block_size, p_moves = None):
+        self.seed = p_seed
+        self.cols = p_cols
+        self.rows = p_rows
+        self.block_size = p_block_size
+        if p_moves is None:
+            p_moves = bytearray()
+        self.moves = p_moves
+
+    #####################################################################################
+    #
+    #   Creplay:to_bytes
+    #       Return: the replay in the file format above
+    #
+    #####################################################################################
+    def to_bytes(self):
+        header = HEADER.pack(MAGIC, VERSION, self.seed, self.cols, self.rows, self.block_size, len(self.moves))
+        return header + zlib.compress(bytes(self.moves), 9)
+
+    #####################################################################################
+    #
+    #   Creplay:from_bytes
+    #       Parameters: 1. p_data...a replay in the file format above
+    #
+    #       Return: a Creplay
+    #
+    #####################################################################################
+    @staticmethod
+    def from_bytes(p_data):
+        magic, version = struct.unpack_from("<4sB", p_data)
+        if magic != MAGIC or version not in (1, VERSION):
+            raise ValueError("not a version 1 or " + str(VERSION) + " snake replay")
+        if version == 1:
+            magic, version, seed, board_size, block_size, steps = HEADER_V1.unpack_from(p_data)
+            cols = board_size // block_size
+            rows = cols
+            header_size = HEADER_V1.size
+        else:
+            magic, version, seed, cols, rows, block_size, steps = HEADER.unpack_from(p_data)
+            header_size = HEADER.size
+        moves = bytearray(zlib.decompress(p_data[header_size:]))
+        if len(moves) != steps:
+            raise ValueError("replay has " + str(len(moves)) + " moves, expected " + str(steps))
+        return Creplay(seed, cols, rows, block_size, moves)
+
+class Creplay_recorder:
+
+    #####################################################################################
+    #
+    #   Creplay_recorder:start
+    #       Description: starts a new replay for the game. The replay is stored in
+    #                    self.replay
+    #
+    #####################################################################################
+    def start(self, p_game, p_snake):
+        self.replay = Creplay(p_game.game_seed, p_game.cols, p_game.rows, p_game.block_size)
+
+    #####################################################################################
+    #
+    #   Creplay_recorder:update
+    #       Description: records the direction of the move that was just played
+    #
+    #####################################################################################
+    def update(self, p_game, p_snake):
+        if len(self.replay.moves) < p_game.steps:
+            direction = p_snake.direction()
+            if direction < 0:
+                direction = NOT_MOVING
+            self.replay.moves.append(direction)
+
+    #####################################################################################
+    #
+    #   Creplay_recorder:end
+    #       Description: records the final move, which is not followed by an update
+    #
+    #####################################################################################
+    def end(self, p_game, p_snake):
+        self.update(p_game, p_snake)
+
+class Creplay_snake(Csnake):
+
+    #####################################################################################
+    #
+    #   Creplay_snake:__init__
+    #       Parameters: 1. p_replay...the Creplay to play
+    #
+    #####################################################################################
+    def __init__(self, p_replay):
+        Csnake.__init__(self, p_replay.cols, p_replay.rows)
+        self.replay = p_replay
+        self.move_index = 0
+
+    #####################################################################################
+    #
+    #   Creplay_snake:steer
+    #       Description: turns in the next recorded direction. After the last recorded
+    #                    move the snake keeps going straight
+    #
+    #####################################################################################
+    def steer(self, snack_location):
+        if self.move_index < len(self.replay.moves):
+            direction = self.replay.moves[self.move_index]
+            if direction != NOT_MOVING:
+                self.turn(direction)
+            self.move_index = self.move_index + 1
+
+#########################################################################################
+#
+#   save_replay
+#       Parameters: 1. p_replay...the Creplay to write
+#                   2. p_path.....the destination file
+#
+#########################################################################################
+def save_replay(p_replay, p_path):
+    data = p_replay.to_bytes()
+    write_atomically(p_path, lambda p_file: p_file.write(data))
+
+#########################################################################################
+#
+#   load_replay
+#       Parameters: 1. p_path...a file written by save_replay
+#
+#       Return: a Creplay
+#
+#########################################################################################
+def load_replay(p_path):
+    with open(p_path, "rb") as replay_file:
+        return Creplay.from_bytes(replay_file.read())
+
+#########################################################################################
+#
+#   play_replay
+#       Parameters: 1. p_replay......the Creplay to play
+#                   2. p_observers...observers for Cgame.play_game. () plays headless,
+#                                    None draws the game in a window
+#
+#       Return: the final size of the snake
+#
+#########################################################################################
+def play_replay(p_replay, p_observers = ()):
+    game = Cgame(p_replay.cols, p_replay.rows, p_replay.block_size)
+    return game.play_game(Creplay_snake(p_replay), p_observers, len(p_replay.moves), p_replay.seed)
@@ -0,0 +1,441 @@
+#########################################################################################
+#
+#                                      Game Server
+#
+#   Purpose: Hosts many games of snake in 1 process. A single asyncio task advances
+#            every session by 1 Cgame.step each tick, players steer over TCP, and
+#            each tick every subscriber is sent 1 frame holding the changes to the
+#            sessions it follows. No session has its own thread or blocking loop.
+#
+#   Ticks: ticks are scheduled against fixed deadlines (start + n * period) rather
+#          than by sleeping a full period after each tick, so the time spent
+#          stepping the sessions does not add up as drift. If the server falls more
+#          than a whole period behind, the missed ticks are dropped instead of
+#          played in a burst. late_ticks and max_lateness record how well the
+#          deadlines were met.
+#
+#   Input: a TCP client is given 1 game when it connects, and sends 1 byte per turn:
+#          "0"-"3" or "l", "r", "u", "d" (left, right, up, down); any other byte is
+#          ignored. Turns are queued, and the snake plays 1 queued turn per tick,
+#          like key presses in Csnake_human.
+#
+#   Frames (all integers little endian):
+#       - 8 bytes.....the tick number
+#       - 4 bytes.....the number of records
+#       - 13 bytes per record:
+#           - 4 bytes...session id
+#           - 1 byte....flags: 1: first record of the session, 2: the snake grew (the
+#                       tail was not removed), 4: the game is over
+#           - 2 bytes...head x    2 bytes...head y    (signed, -1 past the left edge)
+#           - 2 bytes...snack x   2 bytes...snack y   (-1, -1 if there is no snack)
+#       Coordinates are 16 bit, so boards are at most MAX_SIDE cells wide and high.
+#       A client rebuilds a snake by adding each head to the front of its body and
+#       removing the tail unless the grow flag is set.
+#
+#   Usage: python server.py [--port 7777] [--cols 32] [--rows 32] [--rate 10]
+#                           [--bots 0] [--network best_network.npy] [--ticks N]
+#
+#   Classes:
+#       - Cremote_snake...a snake steered by queued turns
+#       - Csession........1 game hosted by the server
+#       - Cgame_server....advances every session on a fixed tick
+#
+#   Functions:
+#       - decode_frame...reads 1 frame sent by the server
+#
+#########################################################################################
+import argparse
+import asyncio
+import struct
+from collections import deque
+import numpy as np
+from game import Cgame
+from snake import Csnake
+
+FRAME = struct.Struct("<QI")
+RECORD = struct.Struct("<IBhhhh")
+# the widest and highest board whose head coordinates (up to 1 past each edge) fit
+# in a record
+MAX_SIDE = 32767
+START = 1
+GROW = 2
+OVER = 4
+COMMANDS = {ord("0"): 0, ord("1"): 1, ord("2"): 2, ord("3"): 3,
+            ord("l"): 0, ord("r"): 1, ord("u"): 2, ord("d"): 3}
+# clients that fall this many bytes behind are disconnected
+MAX_BUFFER = 1 << 20
+
+class Cremote_snake(Csnake):
+
+    #####################################################################################
+    #
+    #   Cremote_snake:__init__
+    #       Parameters: 1. p_cols.........the width of the board in cells
+    #                   2. p_rows.........the height of the board in cells
+    #                   3. p_max_inputs...the most turns queued; older turns are dropped
+    #
+    #####################################################################################
+    def __init__(self, p_cols, p_rows = None, p_max_inputs = 8):
+        Csnake.__init__(self, p_cols, p_rows)
+        self.inputs = deque(maxlen=p_max_inputs)
+
+    #####################################################################################
+    #
+    #   Cremote_snake:steer
+    #       Description: plays the oldest queued turn, if there is one
+    #
+    #####################################################################################
+    def steer(self, snack_location):
+        if self.inputs:
+            self.turn(self.inputs.popleft())
+
+class Csession:
+
+    #####################################################################################
+    #
+    #   Csession:__init__
+    #       Parameters: 1. p_id..........the session id sent in every record
+    #                   2. p_game........the Cgame, already started with p_snake
+    #                   3. p_snake.......the snake being played
+    #                   4. p_max_steps...ends the game after this many steps. If None,
+    #                                    the game runs until the snake dies
+    #
+    #####################################################################################
+    def __init__(self, p_id, p_game, p_snake, p_max_steps = None):
+        self.id = p_id
+        self.game = p_game
+        self.snake = p_snake
+        self.max_steps = p_max_steps
+        self.subscribers = []
+        self.on_end = None
+        self.over = False
+        self.size = p_snake.get_size()
+
+    #####################################################################################
+    #
+    #   Csession:record
+    #       Parameters: 1. p_flags...the flags of the record
+    #
+    #       Return: the current head and snack of the session as 1 record
+    #
+    #####################################################################################
+    def record(self, p_flags):
+        head = self.snake.get_position()[0]
+        snack = self.game.snack
+        if snack is None:
+            snack = (-1, -1)
+        return RECORD.pack(self.id, p_flags, head[0], head[1], snack[0], snack[1])
+
+    #####################################################################################
+    #
+    #   Csession:advance
+    #       Return: the record of 1 step of the game
+    #
+    #####################################################################################
+    def advance(self):
+        flags = 0
+        if self.game.snack is None:
+            self.over = True
+        elif self.game.step(self.snake):
+            self.over = True
+        elif self.max_steps is not None and self.game.steps >= self.max_steps:
+            self.over = True
+        if self.over:
+            flags = OVER
+        if self.snake.get_size() > self.size:
+            flags = flags | GROW
+            self.size = self.snake.get_size()
+        return self.record(flags)
+
+class Cgame_server:
+
+    #####################################################################################
+    #
+    #   Cgame_server:__init__
+    #       Parameters: 1. p_cols...............the width of every board in cells
+    #                   2. p_rows...............the height of every board in cells
+    #                   3. p_steps_per_second...the tick rate
+    #                   4. p_seed...............seeds the games of every session
+    #                   5. p_max_steps..........the longest game, or None
+    #
+    #       Raises: ValueError if a side of the board is longer than MAX_SIDE
+    #
+    #####################################################################################
+    def __init__(self, p_cols = 32, p_rows = None, p_steps_per_second = 10, p_seed = None, p_max_steps = None):
+        if p_rows is None:
+            p_rows = p_cols
+        if p_cols > MAX_SIDE or p_rows > MAX_SIDE:
+            raise ValueError("frames hold boards of at most " + str(MAX_SIDE) + " cells per side, got " + str(p_cols) + " by " + str(p_rows))
+        self.cols = p_cols
+        self.rows = p_rows
+        self.period = 1.0 / p_steps_per_second
+        self.seeds = np.random.default_rng(p_seed)
+        self.max_steps = p_max_steps
+        self.sessions = {}
+        self.joined = []
+        self.watchers = []
+        self.next_id = 0
+        self.tick_count = 0
+        self.late_ticks = 0
+        self.max_lateness = 0.0
+        self.running = False
+
+    #####################################################################################
+    #
+    #   Cgame_server:add_session
+    #       Parameters: 1. p_snake........the snake to play, on a cols by rows board
+    #                   2. p_subscriber...called with every frame holding a record of
+    #                                     this session, or None
+    #                   3. p_on_end.......called with the session after its last frame
+    #                                     is sent, or None
+    #
+    #       Return: the new Csession. Its first record is sent on the next tick
+    #
+    #####################################################################################
+    def add_session(self, p_snake, p_subscriber = None, p_on_end = None):
+        game = Cgame(self.cols, self.rows, p_seed=int(self.seeds.integers(2**63)))
+        game.start_game(p_snake)
+        session = Csession(self.next_id, game, p_snake, self.max_steps)
+        self.next_id = self.next_id + 1
+        if p_subscriber is not None:
+            session.subscribers.append(p_subscriber)
+        session.on_end = p_on_end
+        self.sessions[session.id] = session
+        self.joined.append(session)
+        return session
+
+    #####################################################################################
+    #
+    #   Cgame_server:remove_session
+    #       Parameters: 1. p_id...the id of a session; unknown ids are ignored
+    #
+    #####################################################################################
+    def remove_session(self, p_id):
+        self.sessions.pop(p_id, None)
+
+    #####################################################################################
+    #
+    #   Cgame_server:watch
+    #       Parameters: 1. p_subscriber...called with a frame of every session, every
+    #                                     tick that has records
+    #
+    #####################################################################################
+    def watch(self, p_subscriber):
+        self.watchers.append(p_subscriber)
+
+    #####################################################################################
+    #
+    #   Cgame_server:tick
+    #       Description: steps every session once, sends each subscriber 1 frame with
+    #                    the records of its sessions, then drops the sessions that
+    #                    ended
+    #
+    #####################################################################################
+    def tick(self):
+        self.tick_count = self.tick_count + 1
+        outgoing = {}
+        joined = self.joined
+        self.joined = []
+        for session in joined:
+            if session.id in self.sessions:
+                self.send(outgoing, session, session.record(START))
+        finished = []
+        for session in list(self.sessions.values()):
+            self.send(outgoing, session, session.advance())
+            if session.over:
+                finished.append(session)
+        for subscriber, records in outgoing.items():
+            subscriber(FRAME.pack(self.tick_count, len(records)) + b"".join(records))
+        for session in finished:
+            self.remove_session(session.id)
+            if session.on_end is not None:
+                session.on_end(session)
+
+    #####################################################################################
+    #
+    #   Cgame_server:send
+    #       Parameters: 1. p_outgoing...a dictionary of the records for each subscriber
+    #                                   this tick, updated in place
+    #                   2. p_session....the session the record belongs to
+    #                   3. p_record.....the packed record
+    #
+    #       Description: queues the record for the subscribers of the session and for
+    #                    every watcher
+    #
+    #####################################################################################
+    def send(self, p_outgoing, p_session, p_record):
+        for subscriber in p_session.subscribers:
+            p_outgoing.setdefault(subscriber, []).append(p_record)
+        for subscriber in self.watchers:
+            p_outgoing.setdefault(subscriber, []).append(p_record)
+
+    #####################################################################################
+    #
+    #   Cgame_server:run
+    #       Parameters: 1. p_ticks...stop after this many ticks. If None, run until stop
+    #                                is called
+    #
+    #####################################################################################
+    async def run(self, p_ticks = None):
+        loop = asyncio.get_running_loop()
+        self.running = True
+        deadline = loop.time()
+        last_tick = self.tick_count + p_ticks if p_ticks is not None else None
+        while self.running and (last_tick is None or self.tick_count < last_tick):
+            self.tick()
+            deadline = deadline + self.period
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                self.late_ticks = self.late_ticks + 1
+                if delay < -self.period:
+                    deadline = loop.time()
+                # let the connections read their input before the next tick
+                await asyncio.sleep(0)
+            self.max_lateness = max(self.max_lateness, loop.time() - deadline)
+        self.running = False
+
+    #####################################################################################
+    #
+    #   Cgame_server:stop
+    #       Description: makes run return after the current tick
+    #
+    #####################################################################################
+    def stop(self):
+        self.running = False
+
+    #####################################################################################
+    #
+    #   Cgame_server:handle_client
+    #       Parameters: 1. p_reader, p_writer...the asyncio streams of a TCP client
+    #
+    #       Description: plays 1 game steered by the client. After the frame with the
+    #                    end of the game the server stops writing, and the connection
+    #                    is closed once the client closes its side
+    #
+    #####################################################################################
+    async def handle_client(self, p_reader, p_writer):
+        snake = Cremote_snake(self.cols, self.rows)
+        def send(p_frame):
+            if p_writer.is_closing():
+                return
+            if p_writer.transport.get_write_buffer_size() > MAX_BUFFER:
+                p_writer.close()
+                return
+            p_writer.write(p_frame)
+        def end(p_session):
+            if not p_writer.is_closing():
+                p_writer.write_eof()
+        session = self.add_session(snake, send, end)
+        try:
+            while True:
+                data = await p_reader.read(64)
+                if not data:
+                    break
+                for byte in data:
+                    direction = COMMANDS.get(byte)
+                    if direction is not None:
+                        snake.inputs.append(direction)
+        except ConnectionError:
+            pass
+        finally:
+            self.remove_session(session.id)
+            p_writer.close()
+
+    #####################################################################################
+    #
+    #   Cgame_server:serve
+    #       Parameters: 1. p_host, p_port...where to accept TCP clients
+    #                   2. p_ticks..........passed to run
+    #
+    #####################################################################################
+    async def serve(self, p_host = "127.0.0.1", p_port = 7777, p_ticks = None):
+        server = await asyncio.start_server(self.handle_client, p_host, p_port)
+        async with server:
+            await self.run(p_ticks)
+
+#########################################################################################
+#
+#   decode_frame
+#       Parameters: 1. p_data.....bytes holding frames sent by the server
+#                   2. p_offset...where the frame starts in p_data
+#
+#       Return: (tick, records, offset after the frame), where records is a list of
+#               (session id, flags, (head x, head y), (snack x, snack y)), or None if
+#               p_data does not hold the whole frame yet
+#
+#########################################################################################
+def decode_frame(p_data, p_offset = 0):
+    if len(p_data) < p_offset + FRAME.size:
+        return None
+    tick, count = FRAME.unpack_from(p_data, p_offset)
+    end = p_offset + FRAME.size + count * RECORD.size
+    if len(p_data) < end:
+        return None
+    records = []
+    for session_id, flags, head_x, head_y, snack_x, snack_y in RECORD.iter_unpack(p_data[p_offset + FRAME.size:end]):
+        records.append((session_id, flags, (head_x, head_y), (snack_x, snack_y)))
+    return tick, records, end
+
+#########################################################################################
+#
+#   add_bot
+#       Parameters: 1. p_server....the Cgame_server
+#                   2. p_network...the Cneural_net steering the bot, or None for a new
+#                                  random network
+#
+#       Description: adds a network-controlled session that is replaced by a new one
+#                    when its game ends, so the number of bots stays the same
+#
+#########################################################################################
+def add_bot(p_server, p_network = None):
+    from neural_net import Cneural_net
+    from snake_network import Csnake_network
+    network = p_network
+    if network is None:
+        network = Cneural_net("new", p_server.seeds)
+    snake = Csnake_network(p_server.cols, p_server.rows, network)
+    p_server.add_session(snake, None, lambda p_session: add_bot(p_server, p_network))
+
+#########################################################################################
+#
+#   main
+#       Parameters: 1. p_arguments...the command line options, or None for sys.argv
+#
+#       Description: starts a server with the requested bots and serves TCP clients
+#                    until --ticks have passed or the process is interrupted
+#
+#########################################################################################
+def main(p_arguments = None):
+    parser = argparse.ArgumentParser(description="Host many games of snake over TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--cols", type=int, default=32)
+    parser.add_argument("--rows", type=int, default=None)
+    parser.add_argument("--rate", type=float, default=10, help="ticks per second")
+    parser.add_argument("--bots", type=int, default=0, help="network-controlled sessions to host")
+    parser.add_argument("--network", help="a .npy network for the bots; random networks if not given")
+    parser.add_argument("--max-steps", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--ticks", type=int, default=None, help="stop after this many ticks")
+    arguments = parser.parse_args(p_arguments)
+
+    try:
+        server = Cgame_server(arguments.cols, arguments.rows, arguments.rate, arguments.seed, arguments.max_steps)
+    except ValueError as error:
+        parser.error(str(error))
+    network = None
+    if arguments.network:
+        from checkpoint import load_network
+        network = load_network(arguments.network)
+    for bot in range(arguments.bots):
+        add_bot(server, network)
+    try:
+        asyncio.run(server.serve(arguments.host, arguments.port, arguments.ticks))
+    except KeyboardInterrupt:
+        pass
+    print("ticks: " + str(server.tick_count) + " late: " + str(server.late_ticks) + " max lateness: " + format(server.max_lateness * 1000, ".2f") + " ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#########################################################################################
+#
+#                                      Snake Class
+#
+#   Purpose: The rules for how a snake moves, shared by every kind of snake. Each
+#            kind of snake only decides which way to turn (see steer), so every
+#            snake can be played by Cgame the same way.
+#
+#   Coordinates: the snake lives on a board of cols by rows cells, and every location
+#                is an integer (x,y) cell. How big a cell is on screen is up to Cgame.
+#
+#   Class attributes:
+#       1. size...............stores the length of the snake
+#       2. x_delta............stores the number of cells the snake moves in the x 
+#                             direction each turn
+#       3. y_delta............stores the number of cells the snake moves in the y
+#                             direction each turn
+#       4. board..............a Cboard_state storing the location of each snake block
+#       5. position...........the deque of snake block locations in board, head first
+#
+#   Methods:
+#       - __init__.......initializes the snake to have 1 block located at the center
+#       - move...........moves the snake according to the game rules
+#       - advance........moves the snake 1 block in its current direction
+#       - steer..........chooses the direction of the next move
+#       - turn...........points the snake left, right, up or down
+#       - direction......returns the direction the snake is pointed in
+#       - get_position...returns self.position
+#       - grow...........increments self.size by 1
+#       - get_size.......returns self.size
+#       - valid_board....checks if the board dimensions work
+#
+#########################################################################################
+from numbers import Integral
+from board_state import Cboard_state
+
+# (x,y) direction of each move: 0: left, 1: right, 2: up, 3: down
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+class Csnake:
+
+    #####################################################################################
+    #
+    #   Csnake:__init__
+    #       Parameters: 1. p_cols...the width of the board in cells
+    #                   2. p_rows...the height of the board in cells. If None, the board
+    #                               is square
+    #
+    #       Description: Initializes the snake to the head of the snake is located at the
+    #                    center of the board
+    #
+    #####################################################################################
+    def __init__(self, p_cols, p_rows = None):
+        if p_rows is None:
+            p_rows = p_cols
+        if not self.valid_board(p_cols, p_rows):
+            p_cols = 32
+            p_rows = 32
+        head = (p_cols // 2, p_rows // 2)
+        self.board = Cboard_state(p_cols, p_rows, head)
+        self.position = self.board.body
+        self.size = 1
+        self.x_delta = 0
+        self.y_delta = 0
+
+    #####################################################################################
+    #
+    #   Csnake:move
+    #       Parameters: 1. snack_location...location of the snack on the board
+    #
+    #       Description: Asks steer which way the snake should move, then moves the
+    #                    snake 1 block in that direction (see advance)
+    #
+    #####################################################################################
+    def move(self, snack_location):
+        self.steer(snack_location)
+        self.advance(snack_location)
+
+    #####################################################################################
+    #
+    #   Csnake:advance
+    #       Parameters: 1. snack_location...location of the snack on the board
+    #
+    #       Description: moves the snake 1 block in its current direction. If the head
+    #                    lands on the snack the tail stays where it is and the snake
+    #                    grows. If the snake has length > 1 and it turns in the
+    #                    direction opposite of the current direction, then the snake
+    #                    will die.
+    #
+    #####################################################################################
+    def advance(self, snack_location):
+        head = self.position[0]
+        x_cord = head[0]
+        y_cord = head[1]
+        new_head = (x_cord+self.x_delta, y_cord+self.y_delta)
+        self.board.push_head(new_head)
+        if not (new_head[0] == snack_location[0] and new_head[1] == snack_location[1]):
+            self.board.pop_tail()
+        else:
+            self.grow()
+
+    #####################################################################################
+    #
+    #   Csnake:steer
+    #       Parameters: 1. snack_location...location of the snack on the board
+    #
+    #       Description: sets x_delta and y_delta before each move. The base snake keeps
+    #                    moving in the direction it was previously headed; controllers
+    #                    override this method
+    #
+    #####################################################################################
+    def steer(self, snack_location):
+        pass
+
+    #####################################################################################
+    #
+    #   Csnake:turn
+    #       Parameters: 1. p_direction...0: left, 1: right, 2: up, 3: down
+    #
+    #       Description: points the snake in p_direction
+    #
+    #####################################################################################
+    def turn(self, p_direction):
+        self.x_delta = DIRECTIONS[p_direction][0]
+        self.y_delta = DIRECTIONS[p_direction][1]
+
+    #####################################################################################
+    #
+    #   Csnake:direction
+    #       Returns: 0: left, 1: right, 2: up, 3: down, or -1 if the snake has not
+    #                started moving
+    #
+    #####################################################################################
+    def direction(self):
+        if self.x_delta < 0:
+            return 0
+        if self.x_delta > 0:
+            return 1
+        if self.y_delta < 0:
+            return 2
+        if self.y_delta > 0:
+            return 3
+        return -1
+
+    #####################################################################################
+    #
+    #   Csnake:get_position
+    #       Returns: self.position
+    #
+    #####################################################################################
+    def get_position(self):
+        return self.position
+    
+    #####################################################################################
+    #
+    #   Csnake:grow
+    #       Description: increases self.size by 1
+    #
+    #####################################################################################
+    def grow(self):
+        self.size = self.size + 1
+
+    #####################################################################################
+    #
+    #   Csnake:get_size
+    #       Returns self.size
+    #
+    #####################################################################################
+    def get_size(self):
+        return self.size
+
+    #####################################################################################
+    #
+    #   Csnake:valid_board
+    #       Parameters: 1. p_cols
+    #                   2. p_rows
+    #
+    #       Description: if the dimensions are valid, then the snake is initialized with
+    #                    the input parameters. Otherwise the board is 32 by 32 cells
+    #
+    #       Note: a valid board has a whole number of at least 1 cells in each direction.
+    #             There is no maximum size: the board does not have to fit on a screen
+    #
+    #####################################################################################
+    def valid_board(self, p_cols, p_rows):
+        return isinstance(p_cols, Integral) and isinstance(p_rows, Integral) and p_cols >= 1 and p_rows >= 1
@@ -0,0 +1,38 @@
+#########################################################################################
+#
+#                                   Greedy Snake Class
+#
+#   Purpose: A scripted snake that heads straight for the snack. It is cheap enough
+#            to time the game engine with, and gives trained controllers a baseline
+#            to beat.
+#
+#   Class attributes: see Csnake in snake.py
+#
+#   Methods:
+#       - steer..........turns toward the snack
+#       - all other methods are inherited from Csnake
+#
+#########################################################################################
+from snake import Csnake
+
+class Cgreedy_snake(Csnake):
+
+    #####################################################################################
+    #
+    #   Cgreedy_snake:steer
+    #       Parameters: 1. snack_location...location of the snack on the board
+    #
+    #       Description: closes the horizontal distance to the snack first, then the
+    #                    vertical one. Nothing stops it from turning into its own body
+    #
+    #####################################################################################
+    def steer(self, snack_location):
+        head = self.position[0]
+        if snack_location[0] < head[0]:
+            self.turn(0)
+        elif snack_location[0] > head[0]:
+            self.turn(1)
+        elif snack_location[1] < head[1]:
+            self.turn(2)
+        else:
+            self.turn(3)
@@ -0,0 +1,52 @@
+#########################################################################################
+#
+#                                  Network Snake Class
+#
+#   Purpose: A snake class controlled by a Cneural_net. Each step the snake's vision
+#            (see vision.py) is fed to the network and the snake turns in the
+#            direction of the largest output. No pygame events are read, so the snake
+#            can be played headless.
+#
+#   Class attributes:
+#       1. network...the Cneural_net controlling the snake
+#       2. vision....the Cvision encoder used to build the network input
+#       3. all attributes of Csnake in snake.py
+#
+#   Methods:
+#       - __init__...initializes the snake and the network input buffer
+#       - steer......chooses the direction with the network
+#       - all other methods are inherited from Csnake
+#
+#########################################################################################
+from snake import Csnake
+from vision import Cvision
+
+class Csnake_network(Csnake):
+
+    #####################################################################################
+    #
+    #   Csnake_network:__init__
+    #       Parameters: 1. p_cols......the width of the board in cells
+    #                   2. p_rows......the height of the board in cells
+    #                   3. p_network...the Cneural_net controlling the snake
+    #
+    #####################################################################################
+    def __init__(self, p_cols, p_rows, p_network):
+        Csnake.__init__(self, p_cols, p_rows)
+        self.network = p_network
+        self.vision = Cvision(1, self.board.cols, self.board.rows)
+
+    #####################################################################################
+    #
+    #   Csnake_network:steer
+    #       Parameters: 1. snack_location...location of the snack on the board
+    #
+    #       Description: The network's 4 outputs correspond to left, right, up and down.
+    #                    The input and output vectors are buffers that are reused every
+    #                    step.
+    #
+    #####################################################################################
+    def steer(self, snack_location):
+        inputs = self.vision.encode_board(self.board, snack_location, self.x_delta, self.y_delta)
+        output = self.network.feed_forward(inputs, True)
+        self.turn(int(output.argmax()))
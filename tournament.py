@@ -0,0 +1,401 @@
+#########################################################################################
+#
+#                                      Tournament
+#
+#   Purpose: Compares controllers over thousands of games. Every controller plays the
+#            same grid of game seeds, so they all face the same snack placements,
+#            and the games are shared across worker processes. Each game is reduced
+#            to a few numbers as soon as it ends, so memory does not grow with the
+#            number of games.
+#
+#   Controllers: each is named by a text spec
+#       - greedy..........a scripted snake that heads straight for the snack
+#       - q:<path>........a Csnake_q with a table saved by Cq_table.save
+#       - <path>..........a Csnake_network with a network saved by save_network (or a
+#                         directory of text weights)
+#
+#   Statistics: for each controller, over every game
+#       - length..........mean, standard deviation and exact percentiles of the final
+#                         snake size. Sizes are counted in a histogram with 1 bin per
+#                         cell of the board, so percentiles need no stored games
+#       - steps...........mean number of steps played
+#       - steps_to_death..mean and exact percentiles of the steps of the games that
+#                         ended by hitting a wall or the snake
+#       - snacks_per_100..snacks eaten per 100 steps, over all games
+#       - causes..........how many games ended by WALL, SELF, FULL, or by running
+#                         out of steps or hunger (ALIVE)
+#       Means and variances are kept with Welford's method, and the statistics of
+#       different workers are merged exactly.
+#
+#   Output: save_results writes a .npz with 1 row per controller and run settings
+#           (games, board size, max steps, hunger and first seed): a column for every
+#           statistic and setting above, plus the length and steps histograms, so any
+#           other percentile can be computed later without playing again. Running
+#           again with the same output file only plays the controllers it has no row
+#           for with the same settings, keeps every other row, and ranks every
+#           controller saved with those settings.
+#
+#   Usage: python tournament.py <controller> [<controller> ...] [--games 1000]
+#                               [--cols 20] [--rows 20] [--output results.npz]
+#
+#   Classes:
+#       - Cstream_stats...constant memory statistics of many games
+#
+#   Functions:
+#       - make_snake......builds the snake of a controller spec
+#       - play............plays 1 game and returns its size, steps and cause
+#       - play_games......pool task, plays 1 controller over a range of seeds
+#       - run_tournament..plays every controller over the seed grid
+#       - save_results....writes the statistics as columns
+#       - load_results....reads a file written by save_results
+#       - rows_from_columns...rebuilds the statistics of the rows of a saved file
+#
+#########################################################################################
+import argparse
+import multiprocessing
+import os
+import numpy as np
+from batch_env import ALIVE, WALL, SELF, FULL
+from checkpoint import write_atomically
+from game import Cgame
+
+CAUSE_NAMES = {ALIVE: "timeout", WALL: "wall", SELF: "self", FULL: "full"}
+PERCENTILES = [0.1, 0.5, 0.9, 0.99]
+SETTINGS = ["games", "cols", "rows", "max_steps", "hunger", "first_seed"]
+
+# the networks and tables loaded by the current process, by controller spec
+CONTROLLERS = {}
+
+class Cstream_stats:
+
+    #####################################################################################
+    #
+    #   Cstream_stats:__init__
+    #       Parameters: 1. p_max_length...the largest possible snake (cells on the board)
+    #                   2. p_max_steps....the longest possible game
+    #
+    #####################################################################################
+    def __init__(self, p_max_length, p_max_steps):
+        self.games = 0
+        self.length_mean = 0.0
+        self.length_m2 = 0.0
+        self.steps_total = 0
+        self.snacks_total = 0
+        self.deaths = 0
+        self.death_steps_mean = 0.0
+        self.length_histogram = np.zeros(p_max_length + 1, dtype=np.int64)
+        self.death_histogram = np.zeros(p_max_steps + 1, dtype=np.int64)
+        self.causes = np.zeros(4, dtype=np.int64)
+
+    #####################################################################################
+    #
+    #   Cstream_stats:add
+    #       Parameters: 1. p_length...the final size of the snake
+    #                   2. p_steps....the number of steps played
+    #                   3. p_cause....why the game ended (Cgame.cause)
+    #
+    #####################################################################################
+    def add(self, p_length, p_steps, p_cause):
+        self.games = self.games + 1
+        delta = p_length - self.length_mean
+        self.length_mean = self.length_mean + delta / self.games
+        self.length_m2 = self.length_m2 + delta * (p_length - self.length_mean)
+        self.steps_total = self.steps_total + p_steps
+        self.snacks_total = self.snacks_total + p_length - 1
+        self.length_histogram[p_length] += 1
+        self.causes[p_cause] += 1
+        if p_cause == WALL or p_cause == SELF:
+            self.deaths = self.deaths + 1
+            self.death_steps_mean = self.death_steps_mean + (p_steps - self.death_steps_mean) / self.deaths
+            self.death_histogram[p_steps] += 1
+
+    #####################################################################################
+    #
+    #   Cstream_stats:merge
+    #       Parameters: 1. p_other...statistics of other games of the same controller
+    #
+    #       Description: adds the games of p_other, as if they were added 1 by 1
+    #
+    #####################################################################################
+    def merge(self, p_other):
+        games = self.games + p_other.games
+        if games == 0:
+            return
+        delta = p_other.length_mean - self.length_mean
+        self.length_m2 = self.length_m2 + p_other.length_m2 + delta * delta * self.games * p_other.games / games
+        self.length_mean = self.length_mean + delta * p_other.games / games
+        self.games = games
+        deaths = self.deaths + p_other.deaths
+        if deaths > 0:
+            self.death_steps_mean = (self.death_steps_mean * self.deaths + p_other.death_steps_mean * p_other.deaths) / deaths
+        self.deaths = deaths
+        self.steps_total = self.steps_total + p_other.steps_total
+        self.snacks_total = self.snacks_total + p_other.snacks_total
+        self.length_histogram += p_other.length_histogram
+        self.death_histogram += p_other.death_histogram
+        self.causes += p_other.causes
+
+    #####################################################################################
+    #
+    #   Cstream_stats:summary
+    #       Return: a dictionary of every statistic listed above
+    #
+    #####################################################################################
+    def summary(self):
+        result = {
+            "games": self.games,
+            "length_mean": self.length_mean,
+            "length_std": np.sqrt(self.length_m2 / (self.games - 1)) if self.games > 1 else 0.0,
+            "steps_mean": self.steps_total / self.games if self.games else 0.0,
+            "steps_to_death_mean": self.death_steps_mean,
+            "snacks_per_100": 100.0 * self.snacks_total / self.steps_total if self.steps_total else 0.0,
+        }
+        for q in PERCENTILES:
+            result["length_p" + str(round(q * 100))] = percentile(self.length_histogram, q)
+            result["steps_to_death_p" + str(round(q * 100))] = percentile(self.death_histogram, q)
+        for cause, name in CAUSE_NAMES.items():
+            result[name] = int(self.causes[cause])
+        return result
+
+#########################################################################################
+#
+#   percentile
+#       Parameters: 1. p_histogram...counts of the values 0, 1, 2, ...
+#                   2. p_fraction....the percentile as a fraction, 0 to 1
+#
+#       Return: the smallest value with at least p_fraction of the counts at or below
+#               it (the nearest-rank percentile), or -1 if the histogram is empty
+#
+#########################################################################################
+def percentile(p_histogram, p_fraction):
+    total = p_histogram.sum()
+    if total == 0:
+        return -1
+    rank = max(1, int(np.ceil(p_fraction * total)))
+    return int(np.searchsorted(np.cumsum(p_histogram), rank))
+
+#########################################################################################
+#
+#   make_snake
+#       Parameters: 1. p_spec....a controller spec (see above)
+#                   2. p_cols, p_rows...the board size
+#
+#       Return: a new snake, ready for 1 game. Networks and tables are kept in
+#               CONTROLLERS, so each file is read once per process
+#
+#########################################################################################
+def make_snake(p_spec, p_cols, p_rows):
+    if p_spec == "greedy":
+        from snake_greedy import Cgreedy_snake
+        return Cgreedy_snake(p_cols, p_rows)
+    if p_spec.startswith("q:"):
+        from q_agent import Cq_table, Csnake_q
+        if p_spec not in CONTROLLERS:
+            CONTROLLERS[p_spec] = Cq_table.load(p_spec[2:])
+        return Csnake_q(p_cols, p_rows, CONTROLLERS[p_spec])
+    from neural_net import Cneural_net
+    from snake_network import Csnake_network
+    if p_spec not in CONTROLLERS:
+        CONTROLLERS[p_spec] = Cneural_net(p_spec)
+    return Csnake_network(p_cols, p_rows, CONTROLLERS[p_spec])
+
+#########################################################################################
+#
+#   play
+#       Parameters: 1. p_game........the Cgame to play on
+#                   2. p_snake.......a new snake
+#                   3. p_seed........the seed of the game
+#                   4. p_max_steps...the longest a game may last
+#                   5. p_hunger......the most steps a snake may go without eating
+#
+#       Return: (final size, steps, cause). Games stopped by p_max_steps or p_hunger
+#               end with cause ALIVE
+#
+#########################################################################################
+def play(p_game, p_snake, p_seed, p_max_steps, p_hunger):
+    p_game.start_game(p_snake, p_seed)
+    size = p_snake.get_size()
+    hunger = 0
+    over = p_game.snack is None
+    while not over and not p_game.step(p_snake):
+        hunger = hunger + 1
+        if p_snake.get_size() > size:
+            size = p_snake.get_size()
+            hunger = 0
+        if p_game.steps >= p_max_steps or hunger >= p_hunger:
+            break
+    return p_snake.get_size(), p_game.steps, p_game.cause
+
+#########################################################################################
+#
+#   play_games
+#       Parameters: 1. p_task...(controller spec, first seed, last seed + 1, cols, rows,
+#                               max steps, hunger)
+#
+#       Return: (controller spec, Cstream_stats of the games)
+#
+#########################################################################################
+def play_games(p_task):
+    spec, first_seed, end_seed, cols, rows, max_steps, hunger = p_task
+    game = Cgame(cols, rows)
+    stats = Cstream_stats(cols * rows, max_steps)
+    for seed in range(first_seed, end_seed):
+        stats.add(*play(game, make_snake(spec, cols, rows), seed, max_steps, hunger))
+    return spec, stats
+
+#########################################################################################
+#
+#   run_tournament
+#       Parameters: 1. p_specs.......the controller specs
+#                   2. p_games.......games per controller, on seeds p_first_seed,
+#                                    p_first_seed + 1, ...
+#                   3. p_cols, p_rows...the board size
+#                   4. p_max_steps...the longest a game may last
+#                   5. p_hunger......the most steps a snake may go without eating
+#                   6. p_workers.....the number of processes. If None, 1 per core. If
+#                                    1, the games are played in this process
+#                   7. p_chunk.......games per task
+#                   8. p_first_seed..the first seed of the grid
+#
+#       Return: a dictionary of the Cstream_stats of each spec. The result does not
+#               depend on the number of workers. Controller files are read again on
+#               every call, so retrained files are picked up
+#
+#########################################################################################
+def run_tournament(p_specs, p_games = 1000, p_cols = 20, p_rows = None, p_max_steps = 2000, p_hunger = 400, p_workers = None, p_chunk = 50, p_first_seed = 0):
+    if p_rows is None:
+        p_rows = p_cols
+    CONTROLLERS.clear()
+    tasks = []
+    for spec in p_specs:
+        for start in range(p_first_seed, p_first_seed + p_games, p_chunk):
+            tasks.append((spec, start, min(start + p_chunk, p_first_seed + p_games), p_cols, p_rows, p_max_steps, p_hunger))
+    results = {}
+    for spec in p_specs:
+        results[spec] = Cstream_stats(p_cols * p_rows, p_max_steps)
+    if p_workers == 1:
+        for spec, stats in map(play_games, tasks):
+            results[spec].merge(stats)
+    else:
+        with multiprocessing.Pool(p_workers) as pool:
+            for spec, stats in pool.imap(play_games, tasks):
+                results[spec].merge(stats)
+    return results
+
+#########################################################################################
+#
+#   save_results
+#       Parameters: 1. p_rows...a list of (controller spec, settings, Cstream_stats),
+#                               where settings is a dictionary of the SETTINGS the
+#                               games were played with
+#                   2. p_path...the destination .npz file
+#
+#       Description: writes 1 column per statistic and per setting with 1 row per
+#                    entry of p_rows, plus the "name", "length_histogram" and
+#                    "death_histogram" columns. Rows with smaller boards or shorter
+#                    games have their histograms padded with zeros
+#
+#########################################################################################
+def save_results(p_rows, p_path):
+    summaries = [stats.summary() for name, settings, stats in p_rows]
+    columns = {"name": np.array([name for name, settings, stats in p_rows], dtype=str)}
+    for key in SETTINGS:
+        columns[key] = np.array([settings[key] for name, settings, stats in p_rows], dtype=np.int64)
+    for key in summaries[0]:
+        columns[key] = np.array([summary[key] for summary in summaries])
+    for key in ["length_histogram", "death_histogram"]:
+        histograms = [getattr(stats, key) for name, settings, stats in p_rows]
+        column = np.zeros((len(histograms), max(len(histogram) for histogram in histograms)), dtype=np.int64)
+        for row, histogram in enumerate(histograms):
+            column[row, :len(histogram)] = histogram
+        columns[key] = column
+    write_atomically(p_path, lambda p_file: np.savez_compressed(p_file, **columns))
+
+#########################################################################################
+#
+#   load_results
+#       Parameters: 1. p_path...a file written by save_results
+#
+#       Return: a dictionary of columns
+#
+#########################################################################################
+def load_results(p_path):
+    with np.load(p_path) as data:
+        return {key: data[key] for key in data.files}
+
+#########################################################################################
+#
+#   rows_from_columns
+#       Parameters: 1. p_columns...columns read by load_results
+#
+#       Return: the (controller spec, settings, Cstream_stats) rows the columns were
+#               written from, so saved controllers can be reused and saved again
+#
+#########################################################################################
+def rows_from_columns(p_columns):
+    missing = [key for key in SETTINGS if key not in p_columns]
+    if missing:
+        raise ValueError("results were saved without the settings " + ", ".join(missing))
+    rows = []
+    for row, name in enumerate(p_columns["name"].tolist()):
+        settings = {key: int(p_columns[key][row]) for key in SETTINGS}
+        stats = Cstream_stats(settings["cols"] * settings["rows"], settings["max_steps"])
+        stats.games = int(p_columns["games"][row])
+        stats.length_mean = float(p_columns["length_mean"][row])
+        stats.length_m2 = float(p_columns["length_std"][row]) ** 2 * max(stats.games - 1, 0)
+        stats.length_histogram[:] = p_columns["length_histogram"][row, :len(stats.length_histogram)]
+        stats.death_histogram[:] = p_columns["death_histogram"][row, :len(stats.death_histogram)]
+        stats.deaths = int(stats.death_histogram.sum())
+        stats.death_steps_mean = float(p_columns["steps_to_death_mean"][row])
+        stats.steps_total = int(round(p_columns["steps_mean"][row] * stats.games))
+        stats.snacks_total = int((stats.length_histogram * np.arange(len(stats.length_histogram))).sum()) - stats.games
+        for cause, cause_name in CAUSE_NAMES.items():
+            stats.causes[cause] = int(p_columns[cause_name][row])
+        rows.append((name, settings, stats))
+    return rows
+
+#########################################################################################
+#
+#   main
+#       Parameters: 1. p_arguments...the command line options, or None for sys.argv
+#
+#       Description: plays the controllers that have no saved row with these settings,
+#                    prints the leaderboard and saves every row to --output
+#
+#########################################################################################
+def main(p_arguments = None):
+    parser = argparse.ArgumentParser(description="Compare snake controllers over many seeded games")
+    parser.add_argument("controllers", nargs="+", help="greedy, q:<table.npy> or a network checkpoint")
+    parser.add_argument("--games", type=int, default=1000, help="games per controller")
+    parser.add_argument("--cols", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=None)
+    parser.add_argument("--max-steps", type=int, default=2000)
+    parser.add_argument("--hunger", type=int, default=400, help="most steps without eating")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: 1 per core)")
+    parser.add_argument("--seed", type=int, default=0, help="first seed of the grid")
+    parser.add_argument("--output", help="write the results to this .npz file")
+    arguments = parser.parse_args(p_arguments)
+    if arguments.rows is None:
+        arguments.rows = arguments.cols
+    settings = {"games": arguments.games, "cols": arguments.cols, "rows": arguments.rows, "max_steps": arguments.max_steps, "hunger": arguments.hunger, "first_seed": arguments.seed}
+
+    saved = []
+    if arguments.output and os.path.exists(arguments.output):
+        saved = rows_from_columns(load_results(arguments.output))
+    results = {name: stats for name, row_settings, stats in saved if row_settings == settings}
+    new_specs = [spec for spec in dict.fromkeys(arguments.controllers) if spec not in results]
+    if new_specs:
+        results.update(run_tournament(new_specs, arguments.games, arguments.cols, arguments.rows, arguments.max_steps, arguments.hunger, arguments.workers, p_first_seed=arguments.seed))
+
+    print(format("controller", "<32") + format("length", ">8") + format("p50", ">6") + format("p90", ">6") + format("to death", ">10") + format("/100 steps", ">11") + format("wall", ">7") + format("self", ">7") + format("timeout", ">8"))
+    for spec in sorted(results, key=lambda p_spec: -results[p_spec].length_mean):
+        summary = results[spec].summary()
+        print(format(spec[-32:], "<32") + format(summary["length_mean"], ">8.2f") + format(summary["length_p50"], ">6") + format(summary["length_p90"], ">6")
+              + format(summary["steps_to_death_mean"], ">10.1f") + format(summary["snacks_per_100"], ">11.2f")
+              + format(summary["wall"], ">7") + format(summary["self"], ">7") + format(summary["timeout"], ">8"))
+    if arguments.output:
+        other_rows = [row for row in saved if row[1] != settings]
+        save_results([(name, settings, stats) for name, stats in results.items()] + other_rows, arguments.output)
+
+if __name__ == "__main__":
+    main()
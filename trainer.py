@@ -0,0 +1,182 @@
+#########################################################################################
+#
+#                                       Trainer
+#
+#   Purpose: The parts shared by every trainer that scores networks with a
+#            Cfitness_pool (see genetic_trainer.py and es.py). Each generation:
+#               1. prepare....the trainer writes the networks to score into
+#                             pool.parameters
+#               2. evaluate...the pool plays every row, seeded by (seed, generation)
+#               3. record.....the best network so far and the history are updated
+#               4. update.....the trainer learns from the fitness
+#            Trainers only implement prepare and update, so they are interchangeable
+#            for run_training and main.py.
+#
+#   Class attributes:
+#       1. pool.............the Cfitness_pool that plays the networks
+#       2. rng..............the numpy Generator of the trainer
+#       3. seed.............seeds rng and every game
+#       4. generation.......the number of generations trained so far
+#       5. best_fitness.....the highest fitness seen so far
+#       6. best_parameters..the parameters of the network with best_fitness
+#       7. history..........a list of (best, mean) fitness for every generation
+#
+#   Methods:
+#       - __init__.......creates the pool and the generator
+#       - step...........scores 1 generation and learns from it
+#       - train..........runs step for a number of generations
+#       - prepare........fills pool.parameters before scoring (nothing by default)
+#       - update.........learns from the fitness of 1 generation
+#       - best_network...returns the best network seen so far as a Cneural_net
+#       - result_network.....the network the trainer produces (best_network by default)
+#       - result_population..the parameters saved as the population (pool.parameters by
+#                            default)
+#       - close..........stops the worker processes
+#
+#   Functions:
+#       - run_training...trains, printing every generation, and saves the results
+#
+#########################################################################################
+import numpy as np
+from fitness import Cfitness_pool
+from neural_net import Cneural_net
+
+class Ctrainer:
+
+    #####################################################################################
+    #
+    #   Ctrainer:__init__
+    #       Parameters: 1. p_size.........the number of networks scored each generation
+    #                   2. p_seed.........seeds self.rng and every game
+    #                   3. p_pool_options...keyword arguments for Cfitness_pool (board
+    #                                       size, games, workers, ...)
+    #
+    #       Description: subclasses set self.best_parameters to their first network
+    #
+    #####################################################################################
+    def __init__(self, p_size, p_seed, **p_pool_options):
+        self.seed = p_seed
+        self.rng = np.random.default_rng(p_seed)
+        self.pool = Cfitness_pool(p_size, **p_pool_options)
+        self.generation = 0
+        self.best_fitness = -np.inf
+        self.best_parameters = None
+        self.history = []
+
+    #####################################################################################
+    #
+    #   Ctrainer:step
+    #       Return: the fitness of every network that was scored
+    #
+    #####################################################################################
+    def step(self):
+        self.prepare()
+        fitness = self.pool.evaluate((self.seed, self.generation))
+        best = int(fitness.argmax())
+        if fitness[best] > self.best_fitness:
+            self.best_fitness = fitness[best]
+            self.best_parameters = self.pool.parameters[best].copy()
+        self.history.append((float(fitness[best]), float(fitness.mean())))
+        self.update(fitness)
+        self.generation = self.generation + 1
+        return fitness
+
+    #####################################################################################
+    #
+    #   Ctrainer:train
+    #       Parameters: 1. p_generations...the number of generations to train
+    #                   2. p_callback......if given, called with the trainer after every
+    #                                      generation
+    #
+    #       Return: self.history
+    #
+    #####################################################################################
+    def train(self, p_generations, p_callback = None):
+        for i in range(p_generations):
+            self.step()
+            if p_callback is not None:
+                p_callback(self)
+        return self.history
+
+    #####################################################################################
+    #
+    #   Ctrainer:prepare
+    #       Description: called before each generation is scored. pool.parameters
+    #                    already holds the networks to score unless a subclass fills it
+    #
+    #####################################################################################
+    def prepare(self):
+        pass
+
+    #####################################################################################
+    #
+    #   Ctrainer:update
+    #       Parameters: 1. p_fitness...the fitness of each row of pool.parameters
+    #
+    #####################################################################################
+    def update(self, p_fitness):
+        raise NotImplementedError
+
+    #####################################################################################
+    #
+    #   Ctrainer:best_network
+    #       Return: a Cneural_net with the parameters of the fittest network so far
+    #
+    #####################################################################################
+    def best_network(self):
+        network = Cneural_net("new")
+        network.set_parameters(self.best_parameters)
+        return network
+
+    #####################################################################################
+    #
+    #   Ctrainer:result_network
+    #       Return: the Cneural_net that training produced, saved by run_training
+    #
+    #####################################################################################
+    def result_network(self):
+        return self.best_network()
+
+    #####################################################################################
+    #
+    #   Ctrainer:result_population
+    #       Return: a (N, NUM_PARAMETERS) matrix of the networks to keep training from,
+    #               saved by run_training
+    #
+    #####################################################################################
+    def result_population(self):
+        return self.pool.parameters
+
+    #####################################################################################
+    #
+    #   Ctrainer:close
+    #       Description: stops the worker processes and frees the shared memory
+    #
+    #####################################################################################
+    def close(self):
+        self.pool.close()
+
+#########################################################################################
+#
+#   run_training
+#       Parameters: 1. p_trainer.......a Ctrainer
+#                   2. p_generations...the number of generations to train
+#                   3. p_output........the file for result_network
+#                   4. p_population....if given, the file for result_population
+#
+#       Description: trains, printing the best and mean fitness and the steps played
+#                    after every generation, saves result_network and
+#                    result_population and closes the trainer
+#
+#########################################################################################
+def run_training(p_trainer, p_generations, p_output, p_population = None):
+    from checkpoint import save_network, save_population
+    try:
+        for generation in range(p_generations):
+            fitness = p_trainer.step()
+            print("generation " + str(generation) + ": best " + str(round(fitness.max(), 3)) + " mean " + str(round(fitness.mean(), 3)) + " steps " + str(p_trainer.pool.total_steps))
+        save_network(p_trainer.result_network(), p_output)
+        if p_population:
+            save_population(p_trainer.result_population(), p_population)
+    finally:
+        p_trainer.close()
@@ -0,0 +1,220 @@
+#########################################################################################
+#
+#                                    Vision Encoder
+#
+#   Purpose: Computes the 32 inputs of Cneural_net (see neural_net.py) from the state
+#            of a board, for 1 game or for many games at once.
+#
+#   Input layout: for each of the 8 directions up, up-right, right, down-right, down,
+#                 down-left, left and up-left there are 3 inputs:
+#                       1. 1/d, where d is the number of steps to the wall
+#                       2. 1 if the snack is in that direction, 0 otherwise
+#                       3. 1/d, where d is the number of steps to the nearest snake
+#                          chunk, or 0 if there is none in that direction
+#                 followed by 4 inputs that are 1 for the direction the head is moving
+#                 (left, right, up, down) and 4 inputs that are 1 for the direction
+#                 the tail is moving. A snake that has not moved yet has all 8 of
+#                 those inputs set to 0. (8*3+2*4=32)
+#
+#   Speed: the body of the snake is never searched. Each direction is a ray of cells
+#          starting next to the head, and the first snake chunk on each ray is found
+#          by indexing an occupancy array. Batches of games are encoded with NumPy.
+#          A single Cboard_state is encoded by walking the rays over the board's
+#          count bytearray, which the board keeps up to date as the snake moves, so
+#          nothing has to be rebuilt each step.
+#
+#   Class attributes:
+#       1. num_games...the number of games encoded by each call
+#       2. cols........the width of the board in cells
+#       3. rows........the height of the board in cells
+#       4. features....(num_games,32) output buffer, overwritten by every call
+#
+#   Methods:
+#       - __init__.......allocates the buffers
+#       - encode.........computes the features from arrays of cells
+#       - encode_env.....computes the features of every game in a Cbatch_env
+#       - encode_board...computes the (32,1) features of 1 Cboard_state
+#
+#   Functions:
+#       - direction_index...converts a direction of movement to 0-3 or -1
+#
+#########################################################################################
+import numpy as np
+
+# the 8 vision directions, clockwise starting at up
+RAY_X = np.array([0, 1, 1, 1, 0, -1, -1, -1])
+RAY_Y = np.array([-1, -1, 0, 1, 1, 1, 0, -1])
+RAY_X_LIST = RAY_X.tolist()
+RAY_Y_LIST = RAY_Y.tolist()
+
+# maps (x_delta+1) + 3*(y_delta+1) to 0: left, 1: right, 2: up, 3: down, -1: not moving
+DIRECTION_INDEX = np.array([-1, 2, -1, 0, -1, 1, -1, 3, -1])
+
+class Cvision:
+
+    #####################################################################################
+    #
+    #   Cvision:__init__
+    #       Parameters: 1. p_num_games...the number of games encoded by each call
+    #                   2. p_cols........the width of the board in cells
+    #                   3. p_rows........the height of the board in cells. If None,
+    #                                    the board is square
+    #
+    #####################################################################################
+    def __init__(self, p_num_games, p_cols, p_rows = None):
+        if p_rows is None:
+            p_rows = p_cols
+        self.num_games = p_num_games
+        self.cols = p_cols
+        self.rows = p_rows
+        self.steps = np.arange(1, max(p_cols, p_rows))
+        self.ray_step = RAY_Y * p_cols + RAY_X
+        self.features = np.zeros((p_num_games, 32))
+        self.wall = self.features[:, 0:24:3]
+        self.food = self.features[:, 1:24:3]
+        self.self_distance = self.features[:, 2:24:3]
+        self.head_direction = self.features[:, 24:28]
+        self.tail_direction = self.features[:, 28:32]
+        self.games = np.arange(p_num_games)
+        self.board_values = [0.0] * 32
+        self.board_features = self.features[0:1].reshape(32, 1)
+
+    #####################################################################################
+    #
+    #   Cvision:encode
+    #       Parameters: 1. p_occupancy........(num_games, rows*cols) array, nonzero where
+    #                                         a snake chunk is
+    #                   2. p_head.............the cell of each head
+    #                   3. p_snack............the cell of each snack
+    #                   4. p_head_direction...0-3 (left, right, up, down) or -1 for each
+    #                                         head
+    #                   5. p_tail_direction...0-3 or -1 for each tail
+    #
+    #       Return: the (num_games,32) features buffer
+    #
+    #####################################################################################
+    def encode(self, p_occupancy, p_head, p_snack, p_head_direction, p_tail_direction):
+        head = np.asarray(p_head)
+        x = (head % self.cols)[:, None]
+        y = (head // self.cols)[:, None]
+
+        # number of cells between the head and the wall in each direction
+        unlimited = self.cols + self.rows
+        room_x = np.where(RAY_X > 0, self.cols - 1 - x, np.where(RAY_X < 0, x, unlimited))
+        room_y = np.where(RAY_Y > 0, self.rows - 1 - y, np.where(RAY_Y < 0, y, unlimited))
+        room = np.minimum(room_x, room_y)
+        np.reciprocal(room + 1.0, out=self.wall)
+
+        snack = np.asarray(p_snack)
+        snack_x = (snack % self.cols)[:, None] - x
+        snack_y = (snack // self.cols)[:, None] - y
+        distance = np.maximum(np.abs(snack_x), np.abs(snack_y))
+        self.food[:] = (distance > 0) & (snack_x == RAY_X * distance) & (snack_y == RAY_Y * distance)
+
+        cells = head[:, None, None] + self.ray_step[None, :, None] * self.steps
+        on_board = self.steps <= room[:, :, None]
+        cells = np.where(on_board, cells, 0)
+        hit = (np.asarray(p_occupancy)[self.games[:, None, None], cells] != 0) & on_board
+        first = np.argmax(hit, axis=2) + 1.0
+        np.divide(1.0, first, out=self.self_distance)
+        self.self_distance[~hit.any(axis=2)] = 0
+
+        self.head_direction[:] = 0
+        self.tail_direction[:] = 0
+        moving = p_head_direction >= 0
+        self.head_direction[self.games[moving], p_head_direction[moving]] = 1
+        moving = p_tail_direction >= 0
+        self.tail_direction[self.games[moving], p_tail_direction[moving]] = 1
+        return self.features
+
+    #####################################################################################
+    #
+    #   Cvision:encode_env
+    #       Parameters: 1. p_env...a Cbatch_env with num_games games on the same board
+    #
+    #       Return: the (num_games,32) features buffer. Rows of games that are over are
+    #               not meaningful
+    #
+    #####################################################################################
+    def encode_env(self, p_env):
+        head = p_env.body[self.games, p_env.head_ptr]
+        tail_ptr = (p_env.head_ptr - p_env.length + 1) % p_env.num_cells
+        tail = p_env.body[self.games, tail_ptr]
+        next_chunk = p_env.body[self.games, (tail_ptr + 1) % p_env.num_cells]
+        head_direction = DIRECTION_INDEX[(p_env.x_delta + 1) + 3 * (p_env.y_delta + 1)]
+        tail_x = next_chunk % self.cols - tail % self.cols
+        tail_y = next_chunk // self.cols - tail // self.cols
+        tail_direction = DIRECTION_INDEX[np.clip(tail_x + 1, 0, 2) + 3 * np.clip(tail_y + 1, 0, 2)]
+        tail_direction = np.where(p_env.length > 1, tail_direction, head_direction)
+        return self.encode(p_env.occupancy, head, p_env.snack, head_direction, tail_direction)
+
+    #####################################################################################
+    #
+    #   Cvision:encode_board
+    #       Parameters: 1. p_board...a Cboard_state on a board of cols by rows cells
+    #                                (num_games must be 1)
+    #                   2. p_snack...(x,y) cell of the snack
+    #                   3. p_x_delta, p_y_delta...the direction the snake is moving in
+    #                                             cells per step
+    #
+    #       Return: a (32,1) view of the features buffer, the input of
+    #               Cneural_net.feed_forward
+    #
+    #####################################################################################
+    def encode_board(self, p_board, p_snack, p_x_delta, p_y_delta):
+        cols = p_board.cols
+        rows = p_board.rows
+        count = p_board.count
+        body = p_board.body
+        x, y = body[0]
+        snack_x = p_snack[0] - x
+        snack_y = p_snack[1] - y
+        values = self.board_values
+        for d in range(8):
+            ray_x = RAY_X_LIST[d]
+            ray_y = RAY_Y_LIST[d]
+            room = cols + rows
+            if ray_x > 0:
+                room = cols - 1 - x
+            elif ray_x < 0:
+                room = x
+            if ray_y > 0:
+                room = min(room, rows - 1 - y)
+            elif ray_y < 0:
+                room = min(room, y)
+            values[3*d] = 1.0 / (room + 1)
+            distance = max(abs(snack_x), abs(snack_y))
+            values[3*d+1] = 1.0 if distance > 0 and snack_x == ray_x * distance and snack_y == ray_y * distance else 0.0
+            values[3*d+2] = 0.0
+            cell = y * cols + x
+            step = ray_y * cols + ray_x
+            for k in range(1, room + 1):
+                cell = cell + step
+                if count[cell]:
+                    values[3*d+2] = 1.0 / k
+                    break
+        for i in range(24, 32):
+            values[i] = 0.0
+        head_direction = direction_index(p_x_delta, p_y_delta)
+        tail_direction = head_direction
+        if len(body) > 1:
+            tail_direction = direction_index(body[-2][0] - body[-1][0], body[-2][1] - body[-1][1])
+        if head_direction >= 0:
+            values[24 + head_direction] = 1.0
+        if tail_direction >= 0:
+            values[28 + tail_direction] = 1.0
+        self.features[0] = values
+        return self.board_features
+
+#########################################################################################
+#
+#   direction_index
+#       Parameters: 1. p_x_delta, p_y_delta...a direction of movement, in any units
+#
+#       Return: 0: left, 1: right, 2: up, 3: down, -1: not moving
+#
+#########################################################################################
+def direction_index(p_x_delta, p_y_delta):
+    x = (p_x_delta > 0) - (p_x_delta < 0)
+    y = (p_y_delta > 0) - (p_y_delta < 0)
+    return int(DIRECTION_INDEX[(x + 1) + 3 * (y + 1)])